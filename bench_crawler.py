@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from crawl_engine import AsyncCrawler
+from crawl_metrics import CrawlMetrics
+from crawling import extract_article, extract_article_links
+from extractors import available_backends
+from fixture_site import FixtureSite
+from rate_limiter import RateLimiter
+
+
+def run_config(site, pages, name, concurrency=8, limiter=False, backend='bs4', parse_workers=0):
+    listing_urls = [(page, site.listing_url.format(page)) for page in range(1, pages + 1)]
+    executor = ProcessPoolExecutor(parse_workers) if parse_workers else None
+    metrics = CrawlMetrics(path=None)
+    crawler = AsyncCrawler(partial(extract_article_links, backend=backend), partial(extract_article, backend=backend),
+                           concurrency=concurrency, rate_limiter=RateLimiter() if limiter else None,
+                           parse_executor=executor, metrics=metrics)
+    start = time.perf_counter()
+    records = asyncio.run(crawler.crawl(listing_urls))
+    elapsed = time.perf_counter() - start
+    if executor is not None:
+        executor.shutdown()
+
+    s = metrics.summary()
+    return {
+        'config': name,
+        'records': len(records),
+        'pages_per_sec': s['requests'] / elapsed,
+        'bytes_per_sec': s['bytes'] / elapsed,
+        'fetch_p50_ms': s['fetch_p50'] * 1000,
+        'fetch_p99_ms': s['fetch_p99'] * 1000,
+        'parse_p50_ms': s['parse_p50'] * 1000,
+        'parse_p99_ms': s['parse_p99'] * 1000,
+        'seconds': elapsed,
+    }
+
+
+def default_configs():
+    fastest = available_backends()[0]
+    return [
+        ('sequential', dict(concurrency=1)),
+        ('concurrent-8', dict(concurrency=8)),
+        ('concurrent-32', dict(concurrency=32)),
+        ('concurrent-8+aimd', dict(concurrency=8, limiter=True)),
+        (f'concurrent-8+{fastest}', dict(concurrency=8, backend=fastest)),
+        (f'concurrent-8+{fastest}+pool', dict(concurrency=8, backend=fastest, parse_workers=4)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark crawler configurations against a local fixture site")
+    parser.add_argument('--pages', type=int, default=11)
+    parser.add_argument('--per-page', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05, help="mean injected response latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--archive', default=None, help="serve pages recorded in this raw archive")
+    parser.add_argument('--listing-path', default=None)
+    parser.add_argument('--only', nargs='*', default=None, help="run only these configurations")
+    args = parser.parse_args()
+
+    site_options = dict(pages=args.pages, per_page=args.per_page, latency=args.latency,
+                        error_rate=args.error_rate, archive_dir=args.archive)
+    if args.listing_path:
+        site_options['listing_path'] = args.listing_path
+
+    print(f"{'config':<28}{'records':>8}{'pages/s':>10}{'KB/s':>10}"
+          f"{'fetch p50':>11}{'fetch p99':>11}{'parse p50':>11}{'parse p99':>11}")
+    for name, options in default_configs():
+        if args.only and name not in args.only:
+            continue
+        # 설정마다 서버를 새로 띄워서 오류 주입 난수열이 같게 함
+        with FixtureSite(**site_options) as site:
+            result = run_config(site, args.pages, name, **options)
+        print(f"{result['config']:<28}{result['records']:>8}{result['pages_per_sec']:>10.1f}"
+              f"{result['bytes_per_sec'] / 1024:>10.1f}"
+              f"{result['fetch_p50_ms']:>9.1f}ms{result['fetch_p99_ms']:>9.1f}ms"
+              f"{result['parse_p50_ms']:>9.2f}ms{result['parse_p99_ms']:>9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import glob
+import os
+import time
+
+from extractors import BLOG_POSTING, BACKENDS, available_backends
+
+
+def load_pages(page_dir):
+    # 저장된 HTML 페이지(기본: 크롤러의 HTTP 캐시)를 기사/목록 페이지로 나눠 읽기
+    articles, listings = [], []
+    for path in sorted(glob.glob(os.path.join(page_dir, '**', '*.html'), recursive=True)):
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        # 기사 페이지도 BlogPosting 마크업이 있으므로 본문(entry-content)이 있는지부터 본다
+        if 'entry-content' in html:
+            articles.append(html)
+        elif BLOG_POSTING in html:
+            listings.append(html)
+    return articles, listings
+
+
+def bench(func, pages, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            func(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML extractor backends on saved pages")
+    parser.add_argument('page_dir', nargs='?', default='.http_cache')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    articles, listings = load_pages(args.page_dir)
+    if not articles and not listings:
+        print(f"No saved pages found under '{args.page_dir}'")
+        return
+    total_mb = sum(len(html.encode('utf-8')) for html in articles + listings) / 1e6
+    print(f"{len(articles)} article pages, {len(listings)} listing pages, {total_mb:.2f} MB")
+
+    reference_links, reference_article = BACKENDS['bs4']
+    expected = ([reference_article(html) for html in articles], [reference_links(html) for html in listings])
+
+    print(f"{'backend':<12}{'articles/s':>12}{'listings/s':>12}{'MB/s':>10}  same as bs4")
+    for name in available_backends():
+        extract_links, extract_article = BACKENDS[name]
+        article_time = bench(extract_article, articles, args.repeat)
+        listing_time = bench(extract_links, listings, args.repeat)
+        same = expected == ([extract_article(html) for html in articles], [extract_links(html) for html in listings])
+        print(f"{name:<12}"
+              f"{len(articles) / article_time if articles else 0:>12.1f}"
+              f"{len(listings) / listing_time if listings else 0:>12.1f}"
+              f"{total_mb / (article_time + listing_time):>10.2f}  {same}")
+
+
+if __name__ == "__main__":
+    main()
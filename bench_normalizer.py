@@ -0,0 +1,52 @@
+import argparse
+import re
+import time
+
+from corpus_shards import iter_records
+from text_normalizer import TextNormalizer
+
+
+def legacy_preprocess_text(text):
+    # 예전 crawling.preprocess_text (비교 기준)
+    text = re.sub(r'<.*?>', '', text)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def bench(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure text normalizer throughput on the crawled corpus")
+    parser.add_argument('corpus', nargs='?', default='crawled_articles')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    texts = []
+    for article in iter_records(args.corpus):
+        texts.append(article['title'])
+        texts.append(article['content'])
+    total_mb = sum(len(text.encode('utf-8')) for text in texts) / 1e6
+    print(f"{len(texts)} texts, {total_mb:.2f} MB")
+
+    strip = TextNormalizer(punctuation='strip')
+    sentence = TextNormalizer()
+    cases = [
+        ('legacy re.sub x3', lambda: [legacy_preprocess_text(text) for text in texts]),
+        ('strip', lambda: [strip(text) for text in texts]),
+        ('sentence', lambda: [sentence(text) for text in texts]),
+    ]
+    for name, func in cases:
+        seconds = bench(func, args.repeat)
+        print(f"{name:<22}{total_mb / seconds:>10.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
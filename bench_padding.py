@@ -0,0 +1,106 @@
+import argparse
+import random
+import time
+
+import torch
+from transformers import AutoModelForCausalLM
+from transformers.trainer_pt_utils import LengthGroupedSampler
+
+from finetuning import dataset_dir, load_tokenizer, make_collator, model_name
+from token_shards import TokenBlockDataset, TokenDocDataset, TokenShards
+
+
+def fixed_batches(indices, batch_size):
+    return [indices[i:i + batch_size] for i in range(0, len(indices), batch_size)]
+
+
+def batch_orders(lengths, batch_size, seed=0):
+    # 설정별 배치 구성 (인덱스 리스트의 리스트)
+    shuffled = list(range(len(lengths)))
+    random.Random(seed).shuffle(shuffled)
+    generator = torch.Generator().manual_seed(seed)
+    grouped = list(LengthGroupedSampler(batch_size, lengths=lengths, generator=generator))
+    return {
+        'max_length': fixed_batches(shuffled, batch_size),
+        'dynamic': fixed_batches(shuffled, batch_size),
+        'dynamic+bucketed': fixed_batches(grouped, batch_size),
+    }
+
+
+def padded_length(batch_lengths, mode, max_length, multiple=8):
+    if mode == 'max_length':
+        return max_length
+    if mode == 'packed':
+        return max(batch_lengths)
+    longest = max(batch_lengths)
+    return -(-longest // multiple) * multiple
+
+
+def pad_ratio(lengths, batches, mode, max_length):
+    real = padded = 0
+    for batch in batches:
+        batch_lengths = [lengths[i] for i in batch]
+        real += sum(batch_lengths)
+        padded += padded_length(batch_lengths, mode, max_length) * len(batch)
+    return 1 - real / padded if padded else 0.0
+
+
+def measure(model, collator, dataset, lengths, batches, mode, max_length, steps, pad_token_id):
+    # 학습 한 스텝(순전파+역전파)을 steps번 돌려서 실제(패딩 제외) 토큰 처리 속도를 잰다
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-5)
+    model.train()
+    real = 0
+    start = time.perf_counter()
+    for batch in batches[:steps]:
+        inputs = collator([dataset[i] for i in batch])
+        if mode == 'max_length':
+            # 예전 방식처럼 max_length까지 채움
+            extra = max_length - inputs['input_ids'].shape[1]
+            if extra > 0:
+                inputs['input_ids'] = torch.nn.functional.pad(inputs['input_ids'], (0, extra), value=pad_token_id)
+                inputs['attention_mask'] = torch.nn.functional.pad(inputs['attention_mask'], (0, extra), value=0)
+                inputs['labels'] = torch.nn.functional.pad(inputs['labels'], (0, extra), value=-100)
+        loss = model(**inputs).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+        real += sum(lengths[i] for i in batch)
+    return real / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pad ratio, steps per epoch and training tokens/sec for "
+                                                 "max_length padding, dynamic padding, length bucketing and packing")
+    parser.add_argument('--dataset', default=dataset_dir)
+    parser.add_argument('--model', default=model_name)
+    parser.add_argument('--batch-size', type=int, default=4)
+    parser.add_argument('--max-length', type=int, default=512)
+    parser.add_argument('--steps', type=int, default=10, help="training steps to time per configuration (0: skip)")
+    args = parser.parse_args()
+
+    # 같은 토큰 샤드를 문서 단위(max_length에서 자름)로 쓸 때와 블록으로 패킹할 때를 비교
+    shards = TokenShards(args.dataset)
+    dataset = TokenDocDataset(shards, args.max_length)
+    lengths = dataset.lengths().tolist()
+    batches = batch_orders(lengths, args.batch_size)
+
+    tokenizer = load_tokenizer(args.model)
+    packed = TokenBlockDataset(shards, args.max_length)
+    packed_lengths = [len(packed[i]['input_ids']) for i in range(len(packed))]
+    model = AutoModelForCausalLM.from_pretrained(args.model) if args.steps else None
+
+    print(f"{len(lengths)} samples, mean length {sum(lengths) / len(lengths):.0f} tokens, "
+          f"batch size {args.batch_size}")
+    print(f"{'config':<20}{'pad ratio':>12}{'steps/epoch':>14}{'tokens/s':>12}")
+    runs = [(mode, dataset, lengths, mode_batches, make_collator(tokenizer)) for mode, mode_batches in batches.items()]
+    runs.append(('packed', packed, packed_lengths,
+                 fixed_batches(list(range(len(packed_lengths))), args.batch_size), make_collator(tokenizer, True)))
+    for mode, mode_dataset, mode_lengths, mode_batches, collator in runs:
+        ratio = pad_ratio(mode_lengths, mode_batches, mode, args.max_length)
+        speed = (measure(model, collator, mode_dataset, mode_lengths, mode_batches, mode, args.max_length,
+                         args.steps, tokenizer.pad_token_id) if model is not None else float('nan'))
+        print(f"{mode:<20}{ratio:>12.1%}{len(mode_batches):>14}{speed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# 저장소 루트의 모듈(crawling.py, fixture_site.py 등)을 tests/에서 바로 import할 수 있게 한다
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+
+from corpus_pipeline import write_records
+from corpus_shards import iter_records
+
+# 세대별 delta 목록 (delta 디렉터리 안)
+GENERATIONS_NAME = 'generations.json'
+
+
+def article_id(url):
+    # URL에서 만든 63비트 id. 다시 크롤링하거나 앞의 기사가 빠져도 같은 기사는 같은 id를 가진다.
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big') >> 1
+
+
+def content_hash(record):
+    # 제목/본문이 바뀌었는지 판단하는 해시
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(record['title'].encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(record['content'].encode('utf-8'))
+    return digest.hexdigest()
+
+
+def with_stable_id(record):
+    record['id'] = article_id(record['url'])
+    record['hash'] = content_hash(record)
+    return record
+
+
+def corpus_hashes(path):
+    # {id: hash}. 예전 형식(순번 id, hash 없음) 코퍼스도 URL/내용으로 다시 계산해서 비교할 수 있게 한다.
+    hashes = {}
+    for record in iter_records(path):
+        hashes[article_id(record['url'])] = record.get('hash') or content_hash(record)
+    return hashes
+
+
+def diff_corpus(old_path, records, delta_path):
+    # 기존 코퍼스와 새 레코드 스트림을 비교해서 추가/변경은 upsert, 사라진 기사는 remove로 delta JSONL에 기록.
+    # 기존 코퍼스는 id/hash만 메모리에 두고, 새 레코드는 한 건씩 흘려보낸다.
+    old = corpus_hashes(old_path) if os.path.exists(old_path) else {}
+    counts = {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0}
+    seen = set()
+    tmp_path = delta_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            if 'hash' not in record:
+                record = with_stable_id(record)
+            # 같은 URL이 두 번 나오면 먼저 나온 기사만 남김 (id가 같으므로)
+            if record['id'] in seen:
+                continue
+            seen.add(record['id'])
+            previous = old.get(record['id'])
+            if previous == record['hash']:
+                counts['unchanged'] += 1
+                continue
+            counts['added' if previous is None else 'changed'] += 1
+            f.write(json.dumps({'op': 'upsert', 'record': record}, ensure_ascii=False) + '\n')
+        for record_id in old:
+            if record_id not in seen:
+                counts['removed'] += 1
+                f.write(json.dumps({'op': 'remove', 'id': record_id}) + '\n')
+    os.replace(tmp_path, delta_path)
+    return counts
+
+
+def load_delta(*delta_paths):
+    # (upsert할 {id: record}, 지울 id 집합). 여러 delta를 주면 순서대로 합친다.
+    # 다운스트림 캐시는 이 id들만 다시 계산하면 된다. 지웠다가 다시 추가한 기사는 양쪽에 모두 들어가고
+    # (기존 자리에서 빼고 끝에 붙임), apply_delta와 같은 순서가 된다.
+    upserts = {}
+    removed = set()
+    for delta_path in delta_paths:
+        with open(delta_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                op = json.loads(line)
+                if op['op'] == 'upsert':
+                    upserts[op['record']['id']] = op['record']
+                else:
+                    removed.add(op['id'])
+                    upserts.pop(op['id'], None)
+    return upserts, removed
+
+
+def record_id(record):
+    # 정제된 코퍼스는 저장된 id, 예전 형식(순번 id, hash 없음)은 URL에서 다시 계산
+    return record.get('id') if 'hash' in record else article_id(record['url'])
+
+
+def load_generations(delta_dir):
+    try:
+        with open(os.path.join(delta_dir, GENERATIONS_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def next_delta_path(delta_dir):
+    os.makedirs(delta_dir, exist_ok=True)
+    generations = load_generations(delta_dir)
+    number = generations[-1]['generation'] + 1 if generations else 1
+    return os.path.join(delta_dir, f"delta-{number:06d}.jsonl")
+
+
+def record_generation(delta_dir, delta_path, base, result, keep=20):
+    # 코퍼스를 base(지문)에서 result로 바꾼 delta를 세대 목록에 남긴다. 바뀐 것이 없으면 남기지 않는다.
+    # 마지막 keep개 세대만 보관하고, 그보다 오래 뒤처진 다운스트림은 처음부터 다시 만든다.
+    if base == result:
+        os.remove(delta_path)
+        return None
+    generations = load_generations(delta_dir)
+    number = generations[-1]['generation'] + 1 if generations else 1
+    generations.append({'generation': number, 'file': os.path.basename(delta_path), 'base': base, 'result': result})
+    for old in generations[:-keep]:
+        try:
+            os.remove(os.path.join(delta_dir, old['file']))
+        except FileNotFoundError:
+            pass
+    generations = generations[-keep:]
+    tmp_path = os.path.join(delta_dir, GENERATIONS_NAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(generations, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, os.path.join(delta_dir, GENERATIONS_NAME))
+    return number
+
+
+def deltas_between(delta_dir, base, result):
+    # base 지문의 코퍼스를 result로 만드는 delta 파일들 (순서대로). 중간 세대가 빠졌으면 None
+    if base is None or result is None:
+        return None
+    if base == result:
+        return []
+    generations = load_generations(delta_dir)
+    starts = [index for index, generation in enumerate(generations) if generation['base'] == base]
+    if not starts:
+        return None
+    paths = []
+    current = base
+    for generation in generations[starts[-1]:]:
+        if generation['base'] != current:
+            return None
+        paths.append(os.path.join(delta_dir, generation['file']))
+        current = generation['result']
+        if current == result:
+            return paths
+    return None
+
+
+def apply_delta(base_path, delta_path, out_path=None, shard_size=1000):
+    # 기존 코퍼스 순서를 유지하면서 바뀐 기사는 제자리에서 교체, 지운 기사는 빼고, 새 기사는 끝에 붙인다.
+    # out_path를 주지 않으면 기존 코퍼스를 교체한다. 쓴 레코드 수를 돌려준다.
+    upserts, removed = load_delta(delta_path)
+
+    def merged():
+        if os.path.exists(base_path):
+            for record in iter_records(base_path):
+                key = record_id(record)
+                if key in removed:
+                    continue
+                yield upserts.pop(key, None) or with_stable_id(record)
+        yield from upserts.values()
+
+    return write_records(merged(), out_path or base_path, shard_size)
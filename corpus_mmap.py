@@ -0,0 +1,205 @@
+import mmap
+import os
+import struct
+from array import array
+
+import numpy as np
+
+# 파일 구조 (리틀 엔디언)
+#   헤더 64바이트: 매직, 버전, 필드 수, 레코드 수, 본문 블롭 시작/길이, 인덱스 시작, id 연속 여부, 해시 테이블 크기
+#   블롭: 모든 레코드의 title/content/url을 UTF-8로 이어 붙인 바이트열
+#   인덱스: ids int64[n], offsets uint64[n, 3], lengths uint32[n, 3], sorted_ids int64[n], order int64[n],
+#           table int64[m] (id -> 위치 해시 테이블, 빈 칸은 -1, 버전 2부터)
+MAGIC = b'TDKCORP1'
+VERSION = 2
+FIELDS = ('title', 'content', 'url')
+_HEADER = struct.Struct('<8sIIQQQQQQ')
+# 버전 1 헤더 (해시 테이블 없음)도 읽는다
+_HEADER_V1 = struct.Struct('<8sIIQQQQQ')
+HEADER_SIZE = 64
+
+
+def _hash_table(ids):
+    # 선형 탐사 해시 테이블 (칸 수는 2의 거듭제곱, 채움률 0.5 이하). URL 해시 id는 이미 고르게 퍼져 있고
+    # 순번 id는 충돌이 없으므로 id의 하위 비트를 그대로 칸 번호로 쓴다.
+    if not ids:
+        return np.zeros(0, np.int64)
+    size = 1 << (2 * len(ids) - 1).bit_length()
+    mask = size - 1
+    table = [-1] * size
+    for index, record_id in enumerate(ids):
+        slot = record_id & mask
+        while table[slot] != -1:
+            slot = (slot + 1) & mask
+        table[slot] = index
+    return np.array(table, dtype=np.int64)
+
+
+def write_corpus(records, path):
+    # 레코드를 받는 대로 블롭에 이어 쓰고 인덱스는 끝에 붙인다. 쓴 레코드 수를 돌려준다.
+    # id가 없는 레코드는 순번(1부터)을 id로 쓴다.
+    ids = array('q')
+    offsets = array('Q')
+    lengths = array('I')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(b'\0' * HEADER_SIZE)
+        position = 0
+        for record in records:
+            ids.append(int(record.get('id', len(ids) + 1)))
+            for name in FIELDS:
+                data = (record.get(name) or '').encode('utf-8')
+                f.write(data)
+                offsets.append(position)
+                lengths.append(len(data))
+                position += len(data)
+
+        # 인덱스는 8바이트 경계에 맞춰서 np.frombuffer로 바로 볼 수 있게 함
+        f.write(b'\0' * (-position % 8))
+        index_offset = HEADER_SIZE + position + (-position % 8)
+        id_array = np.frombuffer(ids, dtype=np.int64) if ids else np.zeros(0, np.int64)
+        order = np.argsort(id_array, kind='stable').astype(np.int64)
+        sorted_ids = id_array[order]
+        dense = bool(len(id_array) == 0 or (np.array_equal(order, np.arange(len(order)))
+                                            and sorted_ids[-1] - sorted_ids[0] == len(sorted_ids) - 1))
+        f.write(id_array.astype('<i8').tobytes())
+        f.write(np.frombuffer(offsets, dtype=np.uint64).astype('<u8').tobytes() if offsets else b'')
+        lengths_bytes = np.frombuffer(lengths, dtype=np.uint32).astype('<u4').tobytes() if lengths else b''
+        f.write(lengths_bytes + b'\0' * (-len(lengths_bytes) % 8))
+        f.write(sorted_ids.astype('<i8').tobytes())
+        f.write(order.astype('<i8').tobytes())
+        table = _hash_table(ids)
+        f.write(table.astype('<i8').tobytes())
+
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, len(FIELDS), len(ids), HEADER_SIZE, position, index_offset, int(dense),
+                             len(table)))
+    os.replace(tmp_path, path)
+    return len(ids)
+
+
+class MappedCorpus:
+    # write_corpus로 만든 파일을 mmap으로 열어서, 전체를 읽지 않고 N번째 기사나 id로 바로(O(1)) 찾아간다.
+    # 여는 데는 헤더와 인덱스 배열 뷰만 만들므로 코퍼스 크기와 관계없이 거의 시간이 들지 않는다.
+    # raw()/passage()는 복사 없이 mmap 위의 memoryview를 돌려준다 (close 전에 release 해야 함).
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        version = _HEADER_V1.unpack_from(self._mmap, 0)[1]
+        if version == 1:
+            magic, version, fields, count, blob_offset, blob_size, index_offset, dense = \
+                _HEADER_V1.unpack_from(self._mmap, 0)
+            table_size = 0
+        else:
+            magic, version, fields, count, blob_offset, blob_size, index_offset, dense, table_size = \
+                _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version not in (1, VERSION) or fields != len(FIELDS):
+            self.close()
+            raise ValueError(f"{path} is not a corpus file (version {VERSION})")
+        self.count = count
+        self.dense = bool(dense)
+        width = len(FIELDS)
+        offset = index_offset
+        self.ids = np.frombuffer(self._mmap, dtype='<i8', count=count, offset=offset)
+        offset += 8 * count
+        self.offsets = np.frombuffer(self._mmap, dtype='<u8', count=count * width, offset=offset).reshape(count, width)
+        offset += 8 * count * width
+        self.lengths = np.frombuffer(self._mmap, dtype='<u4', count=count * width, offset=offset).reshape(count, width)
+        offset += 4 * count * width
+        offset += -offset % 8
+        self.sorted_ids = np.frombuffer(self._mmap, dtype='<i8', count=count, offset=offset)
+        offset += 8 * count
+        self.order = np.frombuffer(self._mmap, dtype='<i8', count=count, offset=offset)
+        offset += 8 * count
+        self.table = np.frombuffer(self._mmap, dtype='<i8', count=table_size, offset=offset) if table_size else None
+        self._blob = memoryview(self._mmap)[blob_offset:blob_offset + blob_size]
+
+    def __len__(self):
+        return self.count
+
+    def index_of(self, record_id):
+        # id -> 위치. 해시 테이블에서 O(1)로 찾는다 (버전 1 파일은 연속 id면 O(1), 아니면 이분 탐색)
+        if self.count == 0:
+            raise KeyError(record_id)
+        if self.table is not None:
+            mask = len(self.table) - 1
+            slot = record_id & mask
+            while True:
+                index = int(self.table[slot])
+                if index < 0:
+                    raise KeyError(record_id)
+                if self.ids[index] == record_id:
+                    return index
+                slot = (slot + 1) & mask
+        if self.dense:
+            index = record_id - int(self.ids[0])
+            if 0 <= index < self.count:
+                return index
+            raise KeyError(record_id)
+        pos = int(np.searchsorted(self.sorted_ids, record_id))
+        if pos < self.count and self.sorted_ids[pos] == record_id:
+            return int(self.order[pos])
+        raise KeyError(record_id)
+
+    def raw(self, index, field='content'):
+        # 필드의 UTF-8 바이트를 복사 없이 돌려준다
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        column = FIELDS.index(field)
+        start = int(self.offsets[index, column])
+        return self._blob[start:start + int(self.lengths[index, column])]
+
+    def text(self, index, field='content'):
+        return str(self.raw(index, field), 'utf-8')
+
+    def passage(self, index, start, length, field='content'):
+        # 본문의 [start, start + length) 바이트 구간 (복사 없음). UTF-8 문자 중간에서 자르지 않도록 경계를 당긴다.
+        data = self.raw(index, field)
+        start = min(max(start, 0), len(data))
+        end = min(start + length, len(data))
+        while 0 < start < len(data) and data[start] & 0xC0 == 0x80:
+            start -= 1
+        while 0 < end < len(data) and data[end] & 0xC0 == 0x80:
+            end -= 1
+        return data[start:end]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        record = {'id': int(self.ids[index])}
+        for field in FIELDS:
+            record[field] = self.text(index, field)
+        return record
+
+    def by_id(self, record_id):
+        return self[self.index_of(record_id)]
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def close(self):
+        # numpy 배열/memoryview가 mmap을 잡고 있으면 닫을 수 없으므로 먼저 놓는다
+        for name in ('ids', 'offsets', 'lengths', 'sorted_ids', 'order', 'table'):
+            self.__dict__.pop(name, None)
+        blob = self.__dict__.pop('_blob', None)
+        if blob is not None:
+            blob.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_corpus(path, part=0, parts=1):
+    # parts개로 나눈 레코드 범위 중 part번째만 읽는다 (기본: 전체)
+    with MappedCorpus(path) as corpus:
+        for index in range(len(corpus) * part // parts, len(corpus) * (part + 1) // parts):
+            yield corpus[index]
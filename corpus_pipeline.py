@@ -0,0 +1,109 @@
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from corpus_mmap import write_corpus
+from corpus_shards import iter_records, write_jsonl, write_shards
+from near_dedup import NearDuplicateDetector, article_text
+
+
+def _apply(fn, chunk):
+    # 프로세스 풀 작업자에서 청크 하나를 변환 (None은 버림)
+    return [result for result in map(fn, chunk) if result is not None]
+
+
+def _chunks(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parallel_map(fn, records, workers=None, chunksize=64, prefetch=2):
+    # executor.map은 입력을 한꺼번에 제출하므로, 동시에 처리 중인 청크 수를 workers * prefetch개로
+    # 제한해서 코퍼스 크기와 관계없이 메모리를 일정하게 유지한다. 출력 순서는 입력 순서와 같다.
+    # fn은 다른 프로세스로 넘겨야 하므로 모듈 최상위 함수(또는 functools.partial)여야 한다.
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for chunk in _chunks(records, chunksize):
+            pending.append(executor.submit(_apply, fn, chunk))
+            if len(pending) >= workers * prefetch:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_records(records, path, shard_size=1000):
+    # .corpus면 mmap 코퍼스, .jsonl / .jsonl.gz면 JSONL 파일 하나, 아니면 샤드 디렉터리로 쓴다.
+    # 쓴 레코드 수를 돌려준다.
+    if path.endswith('.corpus'):
+        return write_corpus(records, path)
+    if path.endswith(('.jsonl', '.jsonl.gz')):
+        return write_jsonl(records, path)
+    return write_shards(records, path, shard_size)['records']
+
+
+def _record_key(value):
+    # 정확한 중복 판정용 키는 8바이트 해시만 기억
+    return hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+
+
+class Pipeline:
+    # 레코드 스트림에 filter/map/dedupe/reid 단계를 제너레이터로 이어 붙이고 마지막에 한 번만 흘려 쓴다.
+    # 어느 단계도 전체 코퍼스를 메모리에 올리지 않는다.
+    #   Pipeline.read('crawled_articles').filter(f).map(g, workers=4).dedupe().reid().write('cleaned_articles')
+    def __init__(self, records):
+        self.records = records
+
+    @classmethod
+    def read(cls, path):
+        # 샤드 디렉터리 / mmap 코퍼스 / JSONL(.gz) / JSON 배열 파일에서 한 건씩 읽음
+        return cls(iter_records(path))
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def filter(self, predicate):
+        return Pipeline(record for record in self.records if predicate(record))
+
+    def map(self, fn, workers=0, chunksize=64):
+        # workers가 0이면 현재 프로세스에서, 아니면 프로세스 풀에서 변환. fn이 None을 돌려주면 그 레코드는 버림
+        if workers:
+            return Pipeline(parallel_map(fn, self.records, workers, chunksize))
+        return Pipeline(result for result in map(fn, self.records) if result is not None)
+
+    def apply(self, stage):
+        # 레코드 스트림 전체를 받아 새 스트림을 돌려주는 단계 (배치로 판정하는 QualityFilter 등)
+        return Pipeline(stage(self.records))
+
+    def dedupe(self, key=None, detector=None):
+        # key를 주면 key(record) 값이 같은 레코드를 정확히 걸러내고,
+        # 주지 않으면 MinHash/LSH로 거의 같은 기사와 상용구 기사를 걸러낸다 (먼저 나온 레코드를 남김)
+        if key is None:
+            detector = detector or NearDuplicateDetector()
+            return self.filter(lambda record: detector.check(record['url'], article_text(record)))
+        seen = set()
+
+        def first_seen(record):
+            value = _record_key(key(record))
+            if value in seen:
+                return False
+            seen.add(value)
+            return True
+        return self.filter(first_seen)
+
+    def reid(self, field='id', start=1):
+        # 남은 레코드에 start부터 새 번호 부여
+        def renumber(records):
+            for new_id, record in enumerate(records, start):
+                record[field] = new_id
+                yield record
+        return Pipeline(renumber(self.records))
+
+    def write(self, path, shard_size=1000):
+        return write_records(self.records, path, shard_size)
@@ -0,0 +1,296 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from array import array
+
+import numpy as np
+
+from corpus_mmap import iter_corpus
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class DirectoryWriter:
+    # 출력 디렉터리에 바로 쓰지 않고 임시 디렉터리(out_dir.tmp)에 쓰다가 commit()에서 manifest.json을 남기고
+    # 한 번에 교체한다. 그래서 기존 출력을 읽으면서 같은 디렉터리에 새 출력을 써도 되고,
+    # 중간에 실패하면(abort) 기존 출력이 그대로 남는다. 하위 클래스는 쓰는 중인 파일을 self._file에 둔다.
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.work_dir = out_dir.rstrip('/') + '.tmp'
+        self._file = None
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        os.makedirs(self.work_dir)
+
+    def commit(self, manifest):
+        if os.path.isdir(self.work_dir):
+            with open(os.path.join(self.work_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            old_dir = self.out_dir.rstrip('/') + '.old'
+            shutil.rmtree(old_dir, ignore_errors=True)
+            if os.path.exists(self.out_dir):
+                os.rename(self.out_dir, old_dir)
+            os.rename(self.work_dir, self.out_dir)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        return manifest
+
+    def close(self):
+        raise NotImplementedError
+
+    def abort(self):
+        # 쓰던 파일을 버리고 기존 출력은 그대로 둔다
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ShardWriter(DirectoryWriter):
+    # 레코드를 받는 대로 gzip JSONL 샤드에 이어 쓰고, 끝나면 manifest.json을 남긴다.
+    # 레코드마다 별도의 gzip member로 압축하고, 샤드마다 member 시작 위치를 shard-NNNNN.idx.npy
+    # (int64, 레코드 수 + 1개, 마지막은 샤드 크기)에 따로 남겨서 바로 찾아갈 수 있다.
+    # manifest에는 샤드별 레코드 수/크기/sha256만 두므로 코퍼스가 커져도 manifest는 샤드 수만큼만 커진다.
+    def __init__(self, out_dir, shard_size=1000, prefix='shard'):
+        super().__init__(out_dir)
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.shards = []
+        self.total = 0
+        self._offsets = None
+
+    def _open_shard(self):
+        name = f"{self.prefix}-{len(self.shards):05d}"
+        self._file = open(os.path.join(self.work_dir, name + '.jsonl.gz'), 'wb')
+        self._hash = hashlib.sha256()
+        self._offsets = array('q')
+        self.shards.append({'file': name + '.jsonl.gz', 'index_file': name + '.idx.npy', 'records': 0, 'bytes': 0})
+
+    def _close_shard(self):
+        shard = self.shards[-1]
+        shard['sha256'] = self._hash.hexdigest()
+        self._file.close()
+        self._file = None
+        self._offsets.append(shard['bytes'])
+        np.save(os.path.join(self.work_dir, shard['index_file']), np.frombuffer(self._offsets, dtype=np.int64))
+        self._offsets = None
+
+    def write(self, record):
+        if self._file is None:
+            self._open_shard()
+        shard = self.shards[-1]
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        member = gzip.compress(line, mtime=0)
+        self._offsets.append(shard['bytes'])
+        self._file.write(member)
+        self._hash.update(member)
+        shard['bytes'] += len(member)
+        shard['records'] += 1
+        self.total += 1
+        if shard['records'] >= self.shard_size:
+            self._close_shard()
+
+    def close(self):
+        if self._file is not None:
+            self._close_shard()
+        return self.commit({'format': 'jsonl.gz', 'records': self.total, 'shards': self.shards})
+
+
+def write_shards(records, out_dir, shard_size=1000):
+    with ShardWriter(out_dir, shard_size) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.close()
+
+
+def write_jsonl(records, path):
+    # 샤드 대신 JSONL(.gz) 파일 하나로 흘려 쓰기. 쓴 레코드 수를 돌려준다.
+    opener = gzip.open if path.endswith('.gz') else open
+    count = 0
+    tmp_path = path + '.tmp'
+    with opener(tmp_path, 'wt', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def load_manifest(shard_dir):
+    with open(os.path.join(shard_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def verify_shards(shard_dir):
+    # 각 샤드의 sha256이 manifest와 같은지 확인. 손상된 샤드 파일명 리스트를 돌려준다.
+    bad = []
+    for shard in load_manifest(shard_dir)['shards']:
+        digest = hashlib.sha256()
+        with open(os.path.join(shard_dir, shard['file']), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        if digest.hexdigest() != shard['sha256']:
+            bad.append(shard['file'])
+    return bad
+
+
+def shard_offsets(shard_dir, shard):
+    # 샤드의 gzip member 시작 위치 (레코드 수 + 1개, 마지막은 샤드 크기). 인덱스 파일은 memmap으로 열어서
+    # 필요한 위치만 읽는다. 예전 manifest(샤드마다 offsets 리스트)도 읽는다.
+    if 'index_file' in shard:
+        return np.load(os.path.join(shard_dir, shard['index_file']), mmap_mode='r')
+    return shard['offsets'] + [shard['bytes']]
+
+
+def read_record(shard_dir, index, manifest=None):
+    # 전체를 읽지 않고 index번째 레코드 하나만 꺼낸다
+    manifest = manifest or load_manifest(shard_dir)
+    for shard in manifest['shards']:
+        if index < shard['records']:
+            offsets = shard_offsets(shard_dir, shard)
+            start, end = int(offsets[index]), int(offsets[index + 1])
+            with open(os.path.join(shard_dir, shard['file']), 'rb') as f:
+                f.seek(start)
+                return json.loads(gzip.decompress(f.read(end - start)))
+        index -= shard['records']
+    raise IndexError(index)
+
+
+def resolve_path(path):
+    # 확장자 없이 'crawled_articles'처럼 주면 샤드 디렉터리 -> .corpus -> .jsonl.gz -> .jsonl -> .json 순으로 찾는다
+    if os.path.exists(path):
+        return path
+    for candidate in (path + '.corpus', path + '.jsonl.gz', path + '.jsonl', path + '.json'):
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(path)
+
+
+def corpus_fingerprint(path):
+    # 코퍼스 내용이 바뀌었는지 판단하는 해시. 샤드 디렉터리는 manifest(샤드별 sha256 포함)만 해시한다.
+    path = resolve_path(path)
+    if os.path.isdir(path):
+        path = os.path.join(path, MANIFEST_NAME)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _iter_jsonl(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _iter_json_array(path, chunk_size=1 << 16):
+    # 기존 JSON 배열 파일을 통째로 json.load 하지 않고 조금씩 읽으면서 원소를 하나씩 디코딩
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        started = False
+        eof = False
+        while True:
+            # 다음 값의 시작(공백/쉼표/여는 괄호 뒤)으로 이동
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,[':
+                if buffer[pos] == '[':
+                    if started:
+                        break
+                    started = True
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            if pos < len(buffer):
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # 값이 버퍼 끝에서 잘렸을 수도 있으니 뒤에 구분자가 보일 때만 확정
+                    if end < len(buffer) or eof:
+                        yield value
+                        pos = end
+                        continue
+            if eof:
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+def _iter_shard_range(shard_dir, manifest, start, end):
+    # 샤드 디렉터리의 [start, end)번째 레코드만 읽는다. 레코드마다 gzip member라서 오프셋으로 바로 찾아간다
+    for shard in manifest['shards']:
+        count = shard['records']
+        if start < count and end > 0:
+            first, last = max(start, 0), min(end, count)
+            offsets = shard_offsets(shard_dir, shard)
+            begin, stop = int(offsets[first]), int(offsets[last])
+            with open(os.path.join(shard_dir, shard['file']), 'rb') as f:
+                f.seek(begin)
+                data = gzip.decompress(f.read(stop - begin))
+            for line in data.decode('utf-8').splitlines():
+                if line.strip():
+                    yield json.loads(line)
+        start -= count
+        end -= count
+
+
+def _iter_jsonl_range(path, part, parts):
+    # 압축하지 않은 JSONL을 바이트 구간으로 나눠서 part번째 구간에서 시작하는 줄만 읽는다
+    size = os.path.getsize(path)
+    start, end = size * part // parts, size * (part + 1) // parts
+    with open(path, 'rb') as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_records(path, part=0, parts=1):
+    # 샤드 디렉터리 / mmap 코퍼스(.corpus) / JSONL(.gz) / 기존 JSON 파일을 모두 한 레코드씩 읽는다.
+    # parts > 1이면 parts개로 나눈 것 중 part번째만 읽는다 (DataLoader 작업 프로세스마다 다른 부분).
+    # 샤드 디렉터리와 .corpus는 레코드 범위, JSONL은 바이트 구간으로 나눠서 다른 부분은 디코딩하지 않는다.
+    # 중간부터 읽을 수 없는 .jsonl.gz/.json 파일은 나누지 않고 part 0이 통째로 읽는다.
+    path = resolve_path(path)
+    if parts > 1:
+        if os.path.isdir(path):
+            manifest = load_manifest(path)
+            total = manifest['records']
+            yield from _iter_shard_range(path, manifest, total * part // parts, total * (part + 1) // parts)
+        elif path.endswith('.corpus'):
+            yield from iter_corpus(path, part, parts)
+        elif path.endswith('.jsonl'):
+            yield from _iter_jsonl_range(path, part, parts)
+        elif part == 0:
+            yield from iter_records(path)
+        return
+    if os.path.isdir(path):
+        for shard in load_manifest(path)['shards']:
+            yield from _iter_jsonl(os.path.join(path, shard['file']))
+    elif path.endswith('.corpus'):
+        yield from iter_corpus(path)
+    elif path.endswith('.json'):
+        yield from _iter_json_array(path)
+    else:
+        yield from _iter_jsonl(path)
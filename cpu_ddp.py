@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import socket
+import tempfile
+
+import torch
+import torch.multiprocessing as mp
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def rank_cores(rank, world_size, threads=None):
+    # 이 프로세스가 쓸 수 있는 코어를 rank마다 겹치지 않게 threads개씩 나눈다
+    cores = sorted(os.sched_getaffinity(0))
+    threads = threads or max(1, len(cores) // world_size)
+    mine = cores[rank * threads:(rank + 1) * threads]
+    return mine or cores[rank % len(cores):rank % len(cores) + 1]
+
+
+def default_procs(global_batch_size, batch_size, cores=None):
+    # 코어 4개당 1개 프로세스를 넘지 않으면서 (전체 배치 / 프로세스당 배치)를 나누어떨어지게 하는 가장 큰 수
+    # (나누어떨어지지 않으면 finetuning.train이 gradient accumulation을 맞출 수 없다)
+    limit = max(1, (cores or os.cpu_count() or 1) // 4)
+    steps = max(1, global_batch_size // batch_size)
+    return max(count for count in range(1, min(limit, steps) + 1) if steps % count == 0)
+
+
+def _worker(rank, world_size, port, threads, train_kwargs, result_path):
+    # torchrun과 같은 환경 변수를 두면 Trainer가 gloo 프로세스 그룹을 만든다
+    os.environ.update(MASTER_ADDR='127.0.0.1', MASTER_PORT=str(port), RANK=str(rank), LOCAL_RANK=str(rank),
+                      WORLD_SIZE=str(world_size))
+    cores = rank_cores(rank, world_size, threads)
+    os.sched_setaffinity(0, cores)
+    torch.set_num_threads(len(cores))
+    torch.set_num_interop_threads(1)
+
+    from finetuning import train
+    metrics = train(**train_kwargs)
+    if rank == 0 and result_path:
+        with open(result_path, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f)
+
+
+def launch(world_size, threads=None, **train_kwargs):
+    # finetuning.train을 world_size개 로컬 프로세스에서 데이터 병렬로 실행하고 rank 0의 학습 지표를 돌려준다
+    fd, result_path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    # 자식 프로세스가 torch를 불러오기 전에 OpenMP 스레드 수를 정해두고, 끝나면 부모 환경을 되돌린다
+    omp_threads = os.environ.get('OMP_NUM_THREADS')
+    try:
+        os.environ['OMP_NUM_THREADS'] = str(len(rank_cores(0, world_size, threads)))
+        mp.spawn(_worker, args=(world_size, free_port(), threads, train_kwargs, result_path),
+                 nprocs=world_size, join=True)
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        if omp_threads is None:
+            os.environ.pop('OMP_NUM_THREADS', None)
+        else:
+            os.environ['OMP_NUM_THREADS'] = omp_threads
+        os.remove(result_path)
+
+
+def scaling_report(process_counts, threads=None, **train_kwargs):
+    # 같은 전체 배치/스텝으로 프로세스 수만 바꿔 학습해서 1개 프로세스 대비 확장 효율을 출력
+    results = {}
+    for count in process_counts:
+        metrics = launch(count, threads, **train_kwargs)
+        results[count] = metrics['train_samples_per_second']
+    base_count = min(results)
+    base = results[base_count] / base_count
+    print(f"{'procs':>6}{'samples/s':>12}{'speedup':>10}{'efficiency':>12}")
+    for count, speed in sorted(results.items()):
+        print(f"{count:>6}{speed:>12.2f}{speed / results[base_count]:>9.2f}x{speed / (base * count):>12.1%}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Data-parallel CPU fine-tuning across local processes (gloo)")
+    parser.add_argument('--procs', type=int, default=None, help="data-parallel processes (default: up to one per "
+                                                                 "4 cores that divides global / per-process batch)")
+    parser.add_argument('--threads', type=int, default=None, help="intra-op threads per process "
+                                                                   "(default: cores / procs)")
+    parser.add_argument('--batch-size', type=int, default=4, help="per-process batch size")
+    parser.add_argument('--global-batch-size', type=int, default=16)
+    parser.add_argument('--epochs', type=float, default=3)
+    parser.add_argument('--max-steps', type=int, default=-1)
+    parser.add_argument('--lora-rank', type=int, default=None, help="train LoRA adapters of this rank only")
+    parser.add_argument('--scaling', default=None, help="comma separated process counts to benchmark, e.g. 1,2,4")
+    args = parser.parse_args()
+    if args.procs is None:
+        args.procs = default_procs(args.global_batch_size, args.batch_size)
+
+    train_kwargs = dict(per_device_train_batch_size=args.batch_size, global_batch_size=args.global_batch_size,
+                        num_train_epochs=args.epochs, max_steps=args.max_steps, lora_rank=args.lora_rank)
+    if args.scaling:
+        train_kwargs['save_model'] = False
+        scaling_report([int(count) for count in args.scaling.split(',')], args.threads, **train_kwargs)
+    else:
+        metrics = launch(args.procs, args.threads, **train_kwargs)
+        print(f"Trained with {args.procs} processes: {metrics['train_samples_per_second']:.2f} samples/s, "
+              f"{metrics['seconds_per_step']:.2f}s/step, peak RSS {metrics['peak_rss_mb']:.0f} MB (rank 0)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import asyncio
+import time
+from urllib.parse import urljoin
+
+import aiohttp
+
+from crawl_frontier import DONE, FAILED, IN_FLIGHT
+from near_dedup import article_text
+
+
+class AsyncCrawler:
+    # 목록 페이지(producer)와 기사 페이지(consumer)를 하나의 커넥션 풀 위에서 겹쳐서 가져오는 크롤러
+    def __init__(self, parse_listing, parse_article, concurrency=8, timeout=30, retries=2, headers=None,
+                 rate_limiter=None, cache=None, frontier=None, parse_executor=None, dedup=None,
+                 archive=None, metrics=None):
+        self.parse_listing = parse_listing  # html -> [기사 url, ...]
+        self.parse_article = parse_article  # html -> (title, content)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.frontier = frontier
+        # 파싱은 CPU 작업이라 별도 프로세스 풀에서 돌려 다운로드가 멈추지 않게 함
+        self.parse_executor = parse_executor
+        self.dedup = dedup
+        self.archive = archive
+        self.metrics = metrics
+        self.headers = headers or {"User-Agent": "todoktodok-crawler/1.0"}
+
+    def make_session(self):
+        # keep-alive 커넥션 풀: 호스트당 동시 연결 수를 concurrency로 제한
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        trace_configs = [self.metrics.trace_config()] if self.metrics is not None else None
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers,
+                                     trace_configs=trace_configs)
+
+    async def fetch(self, session, url):
+        # URL 하나의 본문 (실패하면 None). 그 URL에서 난 예외(robots.txt 확인, 캐시/아카이브 쓰기 실패 등
+        # 재시도 대상이 아닌 것 포함)는 metrics에 남기고 None으로 바꿔서, 목록/기사/변경 탐색 중
+        # 어느 URL 하나 때문에 크롤링 전체가 멈추지 않게 한다 (frontier에는 호출한 쪽이 FAILED로 남긴다)
+        try:
+            return await self._fetch(session, url)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Failed to fetch {url}: {error}")
+            if self.metrics is not None:
+                self.metrics.record_fetch(url, 0, {}, error=error)
+            return None
+
+    async def _fetch(self, session, url):
+        limiter = self.rate_limiter
+        if limiter is not None:
+            await limiter.prepare(session, url)
+
+        headers = self.cache.conditional_headers(url) if self.cache is not None else None
+
+        error = None
+        for attempt in range(self.retries + 1):
+            if limiter is not None:
+                await limiter.acquire(url)
+            elif attempt:
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+
+            start = time.monotonic()
+            timings = {'request_start': start}
+            try:
+                async with session.get(url, headers=headers, trace_request_ctx=timings) as response:
+                    raw = await response.read()
+                    status = response.status
+                    response_headers = response.headers
+                    body = raw.decode(response.get_encoding(), errors='replace')
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                # 본문을 읽다가 끊기거나(ClientPayloadError) 시간이 다 된 경우도 여기서 재시도
+                if limiter is not None:
+                    limiter.record(url, None, time.monotonic() - start)
+                if self.metrics is not None:
+                    self.metrics.record_fetch(url, attempt, timings, error=str(e) or type(e).__name__)
+                error = e
+                continue
+
+            if self.metrics is not None:
+                self.metrics.record_fetch(url, attempt, timings, status, len(raw))
+
+            if limiter is not None:
+                limiter.record(url, status, time.monotonic() - start, response_headers.get('Retry-After'))
+            if status == 304 and headers:
+                # 변경 없음: 캐시된 본문 재사용
+                body = self.cache.load_body(url)
+                if body is not None:
+                    if self.archive is not None and url not in self.archive:
+                        # 아카이브를 캐시보다 나중에 만들었으면 변경 없는 페이지가 빠지지 않도록 캐시 본문을 보관
+                        # (캐시에는 디코딩한 본문만 있으므로 UTF-8로 다시 인코딩해서 200 응답으로 남긴다)
+                        cached_headers = [('Content-Type', 'text/html; charset=utf-8')]
+                        if response_headers.get('ETag'):
+                            cached_headers.append(('ETag', response_headers['ETag']))
+                        self.archive.write(url, 200, 'OK', cached_headers, body.encode('utf-8'))
+                    return body
+                # 캐시 본문이 사라졌으면 조건 없이 다시 요청
+                headers = None
+                error = "HTTP 304 without cached body"
+                continue
+            if status < 400:
+                if self.cache is not None:
+                    self.cache.store(url, body, response_headers)
+                if self.archive is not None:
+                    # 추출 규칙이 바뀌어도 다시 받지 않도록 원본 응답을 보관
+                    self.archive.write(url, status, response.reason, response_headers.items(), raw)
+                return body
+            error = f"HTTP {status}"
+            # 429/5xx만 재시도하고 나머지 4xx는 바로 포기
+            if status != 429 and status < 500:
+                break
+
+        print(f"Failed to fetch {url}: {error}")
+        return None
+
+    async def parse(self, parse, html, url):
+        start = time.monotonic()
+        if self.parse_executor is None:
+            result = parse(html)
+        else:
+            result = await asyncio.get_running_loop().run_in_executor(self.parse_executor, parse, html)
+        if self.metrics is not None:
+            self.metrics.record_parse(url, time.monotonic() - start)
+        return result
+
+    async def _produce(self, session, page, url, queue):
+        frontier = self.frontier
+        html = await self.fetch(session, url)
+        try:
+            hrefs = await self.parse(self.parse_listing, html, url) if html is not None else None
+        except Exception as e:
+            print(f"Failed to parse {url}: {e}")
+            hrefs = None
+        if hrefs is None:
+            if frontier is not None:
+                frontier.mark(url, FAILED)
+            return
+
+        for index, href in enumerate(hrefs):
+            article_url = urljoin(url, href)
+            # 이미 본 기사(다른 목록 페이지에 다시 나온 경우 포함)는 건너뜀
+            if frontier is not None and not frontier.add(article_url, 'article', page, index):
+                continue
+            await queue.put((page, index, article_url))
+        if frontier is not None:
+            frontier.mark(url, DONE)
+        print(f"Processed page {page}")
+
+    async def _consume(self, session, queue, results):
+        frontier = self.frontier
+        while True:
+            page, index, article_url = await queue.get()
+            record = None
+            duplicate = False
+            try:
+                if frontier is not None:
+                    frontier.mark(article_url, IN_FLIGHT)
+                html = await self.fetch(session, article_url)
+                if html is not None:
+                    title, content = await self.parse(self.parse_article, html, article_url)
+                    record = {
+                        'title': title,
+                        'content': content,
+                        'url': article_url
+                    }
+                    # 이미 받은 기사와 거의 같거나 본문이 거의 없는 기사는 저장하지 않음
+                    duplicate = self.dedup is not None and not self.dedup.check(article_url, article_text(record))
+            except Exception as e:
+                print(f"Failed to parse {article_url}: {e}")
+            finally:
+                if duplicate:
+                    if frontier is not None:
+                        frontier.mark(article_url, DONE)
+                elif frontier is None:
+                    if record is not None:
+                        results[(page, index)] = record
+                elif record is not None:
+                    frontier.save_record(page, index, record)
+                else:
+                    frontier.mark(article_url, FAILED)
+                queue.task_done()
+
+    async def crawl(self, listing_urls=(), discover=None):
+        # listing_urls: [(page, url), ...]
+        # discover: 목록 대신 새로 받을 기사 [(page, index, url), ...]를 찾아주는 코루틴 함수 (discovery.ChangeDiscovery)
+        frontier = self.frontier
+        resumed = []
+        if frontier is not None:
+            # 진행 상황 파일이 있으면 아직 끝나지 않은 목록/기사만 이어서 수집
+            for page, url in listing_urls:
+                frontier.add(url, 'listing', page)
+            listing_urls = [(page, url) for page, _, url in frontier.pending('listing')]
+            resumed = frontier.pending('article')
+            if self.dedup is not None:
+                # 지난 실행에서 저장한 기사들도 중복 비교 대상으로 등록
+                for record in frontier.records():
+                    self.dedup.add(record['url'], article_text(record))
+
+        results = {}
+        queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        async with self.make_session() as session:
+            workers = [asyncio.create_task(self._consume(session, queue, results))
+                       for _ in range(self.concurrency)]
+            try:
+                for item in resumed:
+                    await queue.put(item)
+                if discover is not None:
+                    for page, index, url in await discover(self, session):
+                        if frontier is None or frontier.add(url, 'article', page, index):
+                            await queue.put((page, index, url))
+                await asyncio.gather(*(self._produce(session, page, url, queue) for page, url in listing_urls))
+                await queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        if frontier is not None:
+            return frontier.records()
+        # 기존 순차 크롤러와 같은 순서(페이지 -> 목록 내 순서)로 정렬
+        return [results[key] for key in sorted(results)]
+
+
+def run_crawl(parse_listing, parse_article, listing_urls=(), discover=None, **kwargs):
+    crawler = AsyncCrawler(parse_listing, parse_article, **kwargs)
+    return asyncio.run(crawler.crawl(listing_urls, discover))
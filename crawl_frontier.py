@@ -0,0 +1,116 @@
+import hashlib
+import math
+import sqlite3
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def url_key(url):
+    # URL을 8바이트 정수로 축약해서 저장/비교 (수만~수백만 URL에서도 충돌 확률이 무시할 수준)
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+
+class BloomFilter:
+    # 이미 본 URL인지 빠르게 거르는 메모리 절약형 필터. 양성일 때만 DB를 확인한다.
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        h1 = key & 0xFFFFFFFF
+        h2 = (key >> 32) & 0xFFFFFFFF
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class CrawlFrontier:
+    # 크롤링 진행 상황(대기/진행중/완료 URL과 수집한 기사)을 SQLite에 바로바로 기록해서
+    # 중간에 죽더라도 다시 실행하면 멈춘 곳부터 이어서 수집한다.
+    def __init__(self, path='crawl_frontier.db', capacity=100000):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS urls (
+                key INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                state TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS urls_state ON urls (kind, state);
+            CREATE TABLE IF NOT EXISTS records (
+                key INTEGER PRIMARY KEY,
+                page INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                url TEXT NOT NULL
+            );
+        """)
+        # 지난 실행에서 끝나지 않은 URL은 다시 대기 상태로
+        self.conn.execute("UPDATE urls SET state = ? WHERE state IN (?, ?)", (PENDING, IN_FLIGHT, FAILED))
+        self.conn.commit()
+
+        self.seen = BloomFilter(capacity=max(capacity, self.count()))
+        for (key,) in self.conn.execute("SELECT key FROM urls"):
+            self.seen.add(key)
+
+    def count(self, state=None):
+        if state is None:
+            return self.conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM urls WHERE state = ?", (state,)).fetchone()[0]
+
+    def add(self, url, kind, page, position=0):
+        # 새로 추가된 URL이면 True, 이미 본 URL이면 False
+        key = url_key(url)
+        if key in self.seen:
+            if self.conn.execute("SELECT 1 FROM urls WHERE key = ?", (key,)).fetchone():
+                return False
+        self.seen.add(key)
+        self.conn.execute("INSERT INTO urls VALUES (?, ?, ?, ?, ?, ?)", (key, url, kind, page, position, PENDING))
+        self.conn.commit()
+        return True
+
+    def pending(self, kind):
+        rows = self.conn.execute(
+            "SELECT page, position, url FROM urls WHERE kind = ? AND state = ? ORDER BY page, position",
+            (kind, PENDING))
+        return rows.fetchall()
+
+    def urls(self, kind):
+        # 상태와 관계없이 등록된 URL 전체 (페이지 -> 목록 내 순서)
+        rows = self.conn.execute("SELECT url FROM urls WHERE kind = ? ORDER BY page, position", (kind,))
+        return [url for (url,) in rows]
+
+    def mark(self, url, state):
+        self.conn.execute("UPDATE urls SET state = ? WHERE key = ?", (state, url_key(url)))
+        self.conn.commit()
+
+    def save_record(self, page, position, record):
+        key = url_key(record['url'])
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?)",
+                              (key, page, position, record['title'], record['content'], record['url']))
+            self.conn.execute("UPDATE urls SET state = ? WHERE key = ?", (DONE, key))
+
+    def records(self):
+        # 커서를 그대로 흘려보내서 기사 수가 많아도 메모리에 한꺼번에 올리지 않음
+        rows = self.conn.execute("SELECT title, content, url FROM records ORDER BY page, position")
+        for title, content, url in rows:
+            yield {'title': title, 'content': content, 'url': url}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,152 @@
+import json
+import time
+from collections import Counter
+
+import aiohttp
+
+# 히스토그램 구간 (초)
+BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def histogram(values):
+    counts = [0] * (len(BUCKETS) + 1)
+    for value in values:
+        for i, bound in enumerate(BUCKETS):
+            if value < bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<{bound * 1000:g}ms" for bound in BUCKETS] + [f">={BUCKETS[-1] * 1000:g}ms"]
+    return list(zip(labels, counts))
+
+
+class CrawlMetrics:
+    # 요청/파싱 단위 이벤트(DNS, 연결, TTFB, 다운로드 시간, 바이트, 상태, 재시도, 파싱 시간)를 JSONL로 남기고
+    # 실행이 끝나면 히스토그램과 가장 느린 URL을 요약한다. path=None이면 파일 없이 메모리에만 모은다.
+    def __init__(self, path='crawl_metrics.jsonl'):
+        self._file = open(path, 'w', encoding='utf-8') if path else None
+        self.fetches = []
+        self.parses = []
+        self.started = time.monotonic()
+
+    def trace_config(self):
+        # aiohttp 추적 훅으로 요청마다 넘긴 dict(trace_request_ctx)에 단계별 시각을 기록
+        config = aiohttp.TraceConfig()
+
+        def mark(key):
+            async def callback(session, context, params):
+                timings = context.trace_request_ctx
+                if timings is not None:
+                    timings[key] = time.monotonic()
+            return callback
+
+        async def reused(session, context, params):
+            if context.trace_request_ctx is not None:
+                context.trace_request_ctx['reused'] = True
+
+        config.on_request_start.append(mark('request_start'))
+        config.on_dns_resolvehost_start.append(mark('dns_start'))
+        config.on_dns_resolvehost_end.append(mark('dns_end'))
+        config.on_connection_create_start.append(mark('connect_start'))
+        config.on_connection_create_end.append(mark('connect_end'))
+        config.on_connection_reuseconn.append(reused)
+        config.on_request_end.append(mark('headers'))
+        return config
+
+    def _write(self, event):
+        if self._file is not None:
+            self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    def record_fetch(self, url, attempt, timings, status=None, size=0, error=None):
+        done = time.monotonic()
+        start = timings.get('request_start', done)
+
+        def span(begin, end):
+            if begin in timings and end in timings:
+                return round(timings[end] - timings[begin], 6)
+            return None
+
+        dns = span('dns_start', 'dns_end')
+        connect = span('connect_start', 'connect_end')
+        if connect is not None and dns is not None:
+            connect = round(connect - dns, 6)
+        headers = timings.get('headers')
+        event = {
+            'type': 'fetch',
+            'url': url,
+            'attempt': attempt,
+            'status': status,
+            'bytes': size,
+            'reused': timings.get('reused', False),
+            'dns': dns,
+            'connect': connect,
+            'ttfb': round(headers - start, 6) if headers else None,
+            'download': round(done - headers, 6) if headers else None,
+            'total': round(done - start, 6),
+            'error': str(error) if error else None,
+        }
+        self.fetches.append(event)
+        self._write(event)
+
+    def record_parse(self, url, seconds):
+        event = {'type': 'parse', 'url': url, 'seconds': round(seconds, 6)}
+        self.parses.append(event)
+        self._write(event)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def summary(self, top=10):
+        elapsed = time.monotonic() - self.started
+        totals = [event['total'] for event in self.fetches]
+        ttfbs = [event['ttfb'] for event in self.fetches if event['ttfb'] is not None]
+        parse_times = [event['seconds'] for event in self.parses]
+        size = sum(event['bytes'] for event in self.fetches)
+        return {
+            'requests': len(self.fetches),
+            'retries': sum(1 for event in self.fetches if event['attempt'] > 0),
+            'errors': sum(1 for event in self.fetches if event['error'] or (event['status'] or 0) >= 400),
+            'statuses': dict(Counter(str(event['status']) for event in self.fetches)),
+            'bytes': size,
+            'seconds': elapsed,
+            'requests_per_sec': len(self.fetches) / elapsed if elapsed else 0.0,
+            'bytes_per_sec': size / elapsed if elapsed else 0.0,
+            'connections_reused': sum(1 for event in self.fetches if event['reused']),
+            'fetch_p50': percentile(totals, 50),
+            'fetch_p99': percentile(totals, 99),
+            'ttfb_p50': percentile(ttfbs, 50),
+            'ttfb_p99': percentile(ttfbs, 99),
+            'parse_p50': percentile(parse_times, 50),
+            'parse_p99': percentile(parse_times, 99),
+            'fetch_histogram': histogram(totals),
+            'parse_histogram': histogram(parse_times),
+            'slowest': [(event['total'], event['url']) for event in
+                        sorted(self.fetches, key=lambda event: event['total'], reverse=True)[:top]],
+        }
+
+    def print_summary(self, top=10):
+        s = self.summary(top)
+        print(f"Requests: {s['requests']} ({s['retries']} retries, {s['errors']} errors) in {s['seconds']:.1f}s "
+              f"= {s['requests_per_sec']:.1f} req/s, {s['bytes_per_sec'] / 1024:.1f} KB/s")
+        print(f"Status codes: {s['statuses']}, reused connections: {s['connections_reused']}")
+        print(f"Fetch p50/p99: {s['fetch_p50'] * 1000:.1f}/{s['fetch_p99'] * 1000:.1f}ms, "
+              f"TTFB p50/p99: {s['ttfb_p50'] * 1000:.1f}/{s['ttfb_p99'] * 1000:.1f}ms, "
+              f"parse p50/p99: {s['parse_p50'] * 1000:.2f}/{s['parse_p99'] * 1000:.2f}ms")
+        for name in ('fetch_histogram', 'parse_histogram'):
+            print(name.replace('_', ' ').capitalize() + ':')
+            peak = max([count for _, count in s[name]] + [1])
+            for label, count in s[name]:
+                print(f"  {label:>10} {'#' * round(40 * count / peak):<40} {count}")
+        print("Slowest URLs:")
+        for seconds, url in s['slowest']:
+            print(f"  {seconds * 1000:8.1f}ms  {url}")
@@ -1,74 +1,126 @@
 import requests
-from bs4 import BeautifulSoup
-import time
-import re
-from transformers import BertTokenizer
-import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from corpus_shards import iter_records, write_shards
+from crawl_engine import run_crawl
+from crawl_frontier import CrawlFrontier, FAILED, PENDING
+from crawl_metrics import CrawlMetrics
+from discovery import ChangeDiscovery
+from extractors import default_backend, get_backend
+from html_archive import HtmlArchive
+from http_cache import HttpCache
+from near_dedup import NearDuplicateDetector, article_text
+from rate_limiter import RateLimiter
+from text_normalizer import normalize_text
+
+BASE_URL = "http://www.realdebate.co.kr/category/%ed%86%a0%eb%a1%a0%ec%9e%90%eb%a3%8c%ec%8b%a4/%ed%86%a0%eb%a1%a0%ea%b5%90%ec%9c%a1/page/{}/"
 
 def preprocess_text(text):
-    # HTML 태그 제거
-    text = re.sub(r'<.*?>', '', text)
-    # 특수 문자 제거
-    text = re.sub(r'[^\w\s]', '', text)
-    # 여러 개의 공백을 하나로 치환
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    # HTML 태그 제거, 한글 NFC 정규화, 문장부호(.?!)만 남기고 특수 문자 제거, 여러 공백을 하나로
+    return normalize_text(text)
+
+def extract_article_links(html, backend=None):
+    extract_links, _ = get_backend(backend)
+    return extract_links(html)
+
+def extract_article(html, backend=None):
+    _, extract = get_backend(backend)
+    title, content = extract(html)
 
-def get_article_content(url):
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    title = soup.find('h1', class_='entry-title').text.strip()
-    content = soup.find('div', class_='entry-content').text.strip()
-    
     # 전처리 적용
     title = preprocess_text(title)
     content = preprocess_text(content)
-    
+
     return title, content
 
-def crawl_debate_site():
-    base_url = "http://www.realdebate.co.kr/category/%ed%86%a0%eb%a1%a0%ec%9e%90%eb%a3%8c%ec%8b%a4/%ed%86%a0%eb%a1%a0%ea%b5%90%ec%9c%a1/page/{}/"
-    
-    all_articles = []
-    
-    for page in range(1, 12):  # 1부터 11페이지까지
-        url = base_url.format(page)
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        articles = soup.find_all('article', itemtype="http://schema.org/BlogPosting")
-        
-        for article in articles:
-            article_url = article.find('h1', class_='entry-title').find('a')['href']
-            title, content = get_article_content(article_url)
-            
-            all_articles.append({
-                'title': title,
-                'content': content,
-                'url': article_url
-            })
-        
-        print(f"Processed page {page}")
-        time.sleep(1)  # 웹사이트에 부담을 주지 않기 위해 1초 대기
-    
-    return all_articles
+def get_article_content(url):
+    response = requests.get(url)
+    return extract_article(response.text)
+
+def merge_with_existing(fetched, existing_path, known):
+    # 새 기사는 사이트 순서대로 앞에 두고, 기존 기사는 그대로 이어 쓰되 바뀐 기사만 새 내용으로 교체
+    # (바뀐 기사만 메모리에 잡아둠)
+    updated = {}
+    for record in fetched:
+        if record['url'] in known:
+            updated[record['url']] = record
+        else:
+            yield record
+    for record in iter_records(existing_path):
+        yield updated.get(record['url'], record)
+
+def crawl_debate_site(base_url=BASE_URL, pages=None, concurrency=8, cache_dir='.http_cache',
+                      frontier_path='crawl_frontier.db', output_dir='crawled_articles', shard_size=1000,
+                      backend=None, parse_workers=None, archive_dir='raw_archive',
+                      metrics_path='crawl_metrics.jsonl', discovery_state='discovery_state.json'):
+    # pages를 주면 그 범위의 목록 페이지를 모두 훑고, 주지 않으면 RSS/사이트맵/목록 페이지에서
+    # 지난 크롤링 이후 새로 올라오거나 바뀐 기사만 찾아서 받은 뒤 기존 코퍼스에 합친다.
+    # 목록 페이지와 기사 페이지는 비동기로 겹쳐서 수집
+    # 고정 1초 대기 대신 호스트별 AIMD 속도 제한으로 웹사이트 부담을 조절
+    # 재크롤링 시에는 조건부 GET으로 바뀌지 않은 페이지의 본문을 캐시에서 재사용
+    dedup = NearDuplicateDetector()
+    known = set()
+    discover = None
+    if pages is None:
+        if os.path.isdir(output_dir):
+            for record in iter_records(output_dir):
+                known.add(record['url'])
+                dedup.add(record['url'], article_text(record))
+        discover = ChangeDiscovery(base_url, known, state_path=discovery_state)
+        listing_urls = []
+    else:
+        listing_urls = [(page, base_url.format(page)) for page in pages]
+
+    cache = HttpCache(cache_dir) if cache_dir else None
+    # 진행 상황을 SQLite에 계속 기록해서, 중간에 죽으면 다시 실행했을 때 이어서 수집
+    frontier = CrawlFrontier(frontier_path) if frontier_path else None
+    # 받은 원본 HTML은 압축 아카이브에 남겨서 추출 규칙이 바뀌면 reextract.py로 다시 만든다
+    archive = HtmlArchive(archive_dir) if archive_dir else None
+    # 요청/파싱마다 걸린 시간과 상태를 JSONL로 남기고 끝나면 요약 출력
+    metrics = CrawlMetrics(metrics_path)
+    # HTML 파싱은 설치된 가장 빠른 백엔드로, 다운로드와 분리된 프로세스 풀에서 실행
+    backend = backend or default_backend()
+    with ProcessPoolExecutor(parse_workers) as parse_executor:
+        articles = run_crawl(partial(extract_article_links, backend=backend),
+                             partial(extract_article, backend=backend),
+                             listing_urls, discover=discover, concurrency=concurrency, rate_limiter=RateLimiter(),
+                             cache=cache, frontier=frontier, parse_executor=parse_executor,
+                             dedup=dedup, archive=archive, metrics=metrics)
+    if archive is not None:
+        archive.close()
+    metrics.close()
+    metrics.print_summary()
+
+    # 수집 결과를 압축 JSONL 샤드로 흘려 쓰기 (전체를 메모리에 모으지 않음)
+    if known:
+        articles = merge_with_existing(articles, output_dir, known)
+    manifest = write_shards(articles, output_dir, shard_size)
+    if discover is not None:
+        discover.save()
+
+    if frontier is not None:
+        finished = frontier.count(PENDING) == 0 and frontier.count(FAILED) == 0
+        frontier.close()
+        # 모두 끝났으면 다음 크롤링은 처음부터 (실패한 URL이 있으면 남겨서 재실행 시 그것만 다시 수집)
+        if finished:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(frontier_path + suffix):
+                    os.remove(frontier_path + suffix)
+    return manifest
 
 if __name__ == "__main__":
-    articles = crawl_debate_site()
-    
+    output_dir = 'crawled_articles'
+    manifest = crawl_debate_site(output_dir=output_dir)
+
     # 결과 출력 (예시)
-    for i, article in enumerate(articles, 1):
+    for i, article in enumerate(iter_records(output_dir), 1):
         print(f"Article {i}:")
         print(f"Title: {article['title']}")
         print(f"URL: {article['url']}")
         print(f"Content preview: {article['content'][:100]}...")  # 내용 일부만 출력
         print("\n")
 
-    print(f"Total articles crawled: {len(articles)}")
-
-    # 크롤링한 데이터를 JSON 파일로 저장
-    with open('crawled_articles.json', 'w', encoding='utf-8') as f:
-        json.dump(articles, f, ensure_ascii=False, indent=2)
-
-    print("Crawled data has been saved to 'crawled_articles.json'")
\ No newline at end of file
+    print(f"Total articles crawled: {manifest['records']}")
+    print(f"Crawled data has been saved to '{output_dir}/' ({len(manifest['shards'])} shards)")
@@ -0,0 +1,155 @@
+import json
+import os
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin, urlsplit
+
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def feed_url_for(listing_url):
+    # WordPress 카테고리 목록 주소(.../category/x/page/{}/)에서 카테고리 RSS 주소(.../category/x/feed/)를 만든다
+    return listing_url.split('page/{}')[0] + 'feed/'
+
+
+def parse_feed(xml_text):
+    # RSS 2.0 / Atom 항목의 (링크, 갱신 시각) 리스트. XML이 아니면 None
+    try:
+        root = ET.fromstring(xml_text)
+    except ET.ParseError:
+        return None
+    entries = []
+    for item in root.iter('item'):
+        link = item.findtext('link')
+        if link:
+            entries.append((link.strip(), (item.findtext('pubDate') or '').strip() or None))
+    atom = '{http://www.w3.org/2005/Atom}'
+    for entry in root.iter(atom + 'entry'):
+        link = entry.find(atom + 'link')
+        if link is not None and link.get('href'):
+            entries.append((link.get('href'), entry.findtext(atom + 'updated')))
+    return entries
+
+
+def parse_sitemap(xml_text):
+    # (하위 사이트맵 주소 리스트, (주소, lastmod) 리스트). XML이 아니면 None
+    try:
+        root = ET.fromstring(xml_text)
+    except ET.ParseError:
+        return None
+    children = [loc.text.strip() for loc in root.iter(SITEMAP_NS + 'loc')
+                if root.tag == SITEMAP_NS + 'sitemapindex' and loc.text]
+    urls = []
+    if root.tag == SITEMAP_NS + 'urlset':
+        for entry in root.iter(SITEMAP_NS + 'url'):
+            loc = entry.findtext(SITEMAP_NS + 'loc')
+            if loc:
+                urls.append((loc.strip(), (entry.findtext(SITEMAP_NS + 'lastmod') or '').strip() or None))
+    return children, urls
+
+
+class ChangeDiscovery:
+    # 사이트 전체를 고정 페이지 범위로 훑는 대신 새로 올라오거나 바뀐 기사만 찾아서 크롤링 대상으로 넘긴다.
+    #   새 기사: 카테고리 RSS를 최신순으로 읽다가 이미 아는 기사가 나오면 멈춤.
+    #            RSS가 없으면 목록 페이지를 1쪽부터 넘기다가 이미 아는 기사가 나오는 쪽에서 멈춤.
+    #   바뀐 기사: 사이트맵의 lastmod가 지난번에 기록해 둔 값과 다른 기사.
+    def __init__(self, listing_url, known=(), state_path='discovery_state.json', max_pages=1000,
+                 feed_url=None, sitemap_urls=None, max_feed_pages=50):
+        self.listing_url = listing_url
+        self.known = set(known)
+        self.state_path = state_path
+        self.max_pages = max_pages
+        self.max_feed_pages = max_feed_pages
+        self.feed_url = feed_url or feed_url_for(listing_url)
+        parts = urlsplit(listing_url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        self.sitemap_urls = sitemap_urls or [origin + '/wp-sitemap.xml', origin + '/sitemap.xml']
+        self.lastmods = {}
+        if state_path and os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.lastmods = json.load(f)
+
+    def save(self):
+        if self.state_path:
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                json.dump(self.lastmods, f, ensure_ascii=False)
+
+    async def from_feed(self, crawler, session):
+        new_urls = []
+        for page in range(1, self.max_feed_pages + 1):
+            url = self.feed_url if page == 1 else f"{self.feed_url}?paged={page}"
+            text = await crawler.fetch(session, url)
+            entries = parse_feed(text) if text is not None else None
+            if not entries:
+                # 첫 쪽부터 피드가 없으면 None을 돌려서 목록 페이지 탐색으로 넘어감
+                return new_urls if page > 1 else None
+            for link, _ in entries:
+                if link in self.known:
+                    return new_urls
+                new_urls.append(link)
+        return new_urls
+
+    async def from_pagination(self, crawler, session):
+        new_items = []
+        for page in range(1, self.max_pages + 1):
+            url = self.listing_url.format(page)
+            html = await crawler.fetch(session, url)
+            if html is None:
+                break
+            try:
+                links = [urljoin(url, href) for href in await crawler.parse(crawler.parse_listing, html, url)]
+            except Exception as e:
+                # 목록 페이지 하나가 깨져도 크롤링 전체를 멈추지 않고 다음 쪽으로
+                print(f"Failed to parse {url}: {e}")
+                continue
+            if not links:
+                break
+            reached_known = False
+            for index, link in enumerate(links):
+                if link in self.known:
+                    reached_known = True
+                else:
+                    new_items.append((page, index, link))
+            print(f"Processed page {page}")
+            if reached_known:
+                break
+        return new_items
+
+    async def changed_from_sitemaps(self, crawler, session):
+        changed = []
+        pending = list(self.sitemap_urls)
+        visited = set()
+        while pending:
+            url = pending.pop(0)
+            if url in visited:
+                continue
+            visited.add(url)
+            text = await crawler.fetch(session, url)
+            parsed = parse_sitemap(text) if text is not None else None
+            if parsed is None:
+                continue
+            children, entries = parsed
+            pending.extend(children)
+            for link, lastmod in entries:
+                if not lastmod:
+                    continue
+                # 이번에 새로 받는 기사까지 모든 항목의 lastmod를 매번 기록해 두고,
+                # 이미 가진 기사 중 이전 기록과 다른 것만 다시 받음
+                previous = self.lastmods.get(link)
+                self.lastmods[link] = lastmod
+                if link in self.known and previous is not None and previous != lastmod:
+                    changed.append(link)
+        return changed
+
+    async def __call__(self, crawler, session):
+        # 크롤 엔진이 부르는 진입점. 새로 받을 기사 [(page, index, url), ...]
+        feed_urls = await self.from_feed(crawler, session)
+        if feed_urls is None:
+            items = await self.from_pagination(crawler, session)
+        else:
+            items = [(0, index, url) for index, url in enumerate(feed_urls)]
+        # 첫 실행(아는 기사가 없을 때)에도 사이트맵을 읽어 lastmod를 남겨야 다음 실행에서 수정을 알아챈다
+        seen = {url for _, _, url in items}
+        changed = [url for url in await self.changed_from_sitemaps(crawler, session) if url not in seen]
+        items += [(self.max_pages + 1, index, url) for index, url in enumerate(changed)]
+        print(f"Discovered {len(items)} new or changed articles")
+        return items
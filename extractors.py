@@ -0,0 +1,94 @@
+import importlib.util
+
+from bs4 import BeautifulSoup
+
+BLOG_POSTING = "http://schema.org/BlogPosting"
+
+
+# 백엔드마다 (목록 페이지 -> 기사 링크, 기사 페이지 -> (제목, 본문)) 함수 쌍을 제공한다.
+# 본문 텍스트는 모두 하위 노드 텍스트를 이어붙인 값이라 전처리 후 결과가 같다.
+# (BeautifulSoup의 .text처럼 script/style/template 안의 텍스트는 제외)
+NON_TEXT_TAGS = ['script', 'style', 'template']
+
+def bs4_links(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    articles = soup.find_all('article', itemtype=BLOG_POSTING)
+    return [article.find('h1', class_='entry-title').find('a')['href'] for article in articles]
+
+def bs4_article(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.find('h1', class_='entry-title').text.strip()
+    content = soup.find('div', class_='entry-content').text.strip()
+    return title, content
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+LXML_ARTICLES = f"//article[@itemtype='{BLOG_POSTING}']"
+LXML_TITLE = f"//h1[{_has_class('entry-title')}]"
+LXML_CONTENT = f"//div[{_has_class('entry-content')}]"
+LXML_NON_TEXT = '|'.join(f'.//{tag}' for tag in NON_TEXT_TAGS)
+
+def _lxml_text(node):
+    for child in node.xpath(LXML_NON_TEXT):
+        child.drop_tree()
+    return node.text_content().strip()
+
+def lxml_links(html):
+    from lxml import html as lxml_html
+    links = []
+    for article in lxml_html.fromstring(html).xpath(LXML_ARTICLES):
+        title = article.xpath('.' + LXML_TITLE)[0]
+        links.append(title.xpath('.//a')[0].get('href'))
+    return links
+
+def lxml_article(html):
+    from lxml import html as lxml_html
+    tree = lxml_html.fromstring(html)
+    # 필요한 두 노드만 XPath로 찾아 텍스트를 꺼냄
+    title = _lxml_text(tree.xpath(LXML_TITLE)[0])
+    content = _lxml_text(tree.xpath(LXML_CONTENT)[0])
+    return title, content
+
+
+def selectolax_links(html):
+    from selectolax.lexbor import LexborHTMLParser
+    tree = LexborHTMLParser(html)
+    links = []
+    for article in tree.css(f'article[itemtype="{BLOG_POSTING}"]'):
+        links.append(article.css_first('h1.entry-title').css_first('a').attributes['href'])
+    return links
+
+def selectolax_article(html):
+    from selectolax.lexbor import LexborHTMLParser
+    tree = LexborHTMLParser(html)
+    tree.strip_tags(NON_TEXT_TAGS)
+    title = tree.css_first('h1.entry-title').text().strip()
+    content = tree.css_first('div.entry-content').text().strip()
+    return title, content
+
+
+BACKENDS = {
+    'bs4': (bs4_links, bs4_article),
+    'lxml': (lxml_links, lxml_article),
+    'selectolax': (selectolax_links, selectolax_article),
+}
+
+# 설치되어 있으면 빠른 백엔드부터 사용
+_PREFERENCE = [('selectolax', 'selectolax'), ('lxml', 'lxml'), ('bs4', 'bs4')]
+
+
+def available_backends():
+    return [name for name, module in _PREFERENCE if importlib.util.find_spec(module) is not None]
+
+
+def default_backend():
+    return available_backends()[0]
+
+
+def get_backend(name=None):
+    name = name or default_backend()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown extractor backend: {name} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name]
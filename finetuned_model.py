@@ -0,0 +1,26 @@
+import os
+
+from transformers import AutoTokenizer, AutoModelForCausalLM
+
+# 추론 쪽(main3.py)에서 학습 스택(finetuning.py) 없이 파인튜닝한 모델만 읽기 위한 모듈
+model_dir = "./fine_tuned_debate_model"
+
+def import_peft():
+    # LoRA 학습/어댑터 로딩에만 필요하므로 그때 가져온다. 없으면 설치 방법을 알려준다
+    try:
+        import peft
+    except ImportError as e:
+        raise ImportError("LoRA adapters need the 'peft' package: pip install peft "
+                          "(or pip install -r requirements.txt)") from e
+    return peft
+
+def load_finetuned_model(path=model_dir, merge=True):
+    # 전체 모델 디렉터리와 LoRA 어댑터 디렉터리(adapter_config.json) 모두 읽는다.
+    # 어댑터면 기본 모델 위에 얹고, merge=True면 가중치에 합쳐서 추론 때 추가 연산이 없게 한다.
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    if not os.path.exists(os.path.join(path, "adapter_config.json")):
+        return tokenizer, AutoModelForCausalLM.from_pretrained(path)
+    model = import_peft().AutoPeftModelForCausalLM.from_pretrained(path)
+    if merge:
+        model = model.merge_and_unload()
+    return tokenizer, model
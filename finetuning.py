@@ -1,44 +1,257 @@
+import hashlib
 import json
-from transformers import AutoTokenizer, AutoModelForCausalLM, TrainingArguments, Trainer
-from datasets import Dataset
+import os
+import resource
+from functools import partial
 
-# JSON 데이터 로드
-with open('crawled_articles.json', 'r', encoding='utf-8') as f:
-    articles = json.load(f)
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForCausalLM, DataCollatorForLanguageModeling, TrainingArguments
 
-# 데이터셋 준비
-texts = [f"토론 주제: {article['title']}\n내용: {article['content']}" for article in articles]
-dataset = Dataset.from_dict({"text": texts})
+from corpus_delta import deltas_between, load_delta, record_id
+from corpus_pipeline import parallel_map
+from corpus_shards import corpus_fingerprint, iter_records
+from finetuned_model import import_peft, model_dir
+from stream_dataset import StreamingTextDataset, format_record
+from token_shards import (TokenBlockDataset, TokenDocDataset, TokenShards, TokenShardWriter, cached_key, open_cached,
+                          token_dtype)
+from training_telemetry import TelemetryTrainer, TrainingTelemetry
 
-# 모델 및 토크나이저 초기화 (한국어 모델 사용)
+# 전처리(preprocessing.py)를 거친 코퍼스로 학습
+corpus_path = 'cleaned_articles'
+dataset_dir = 'tokenized_dataset'
 model_name = "skt/kogpt2-base-v2"  # 또는 다른 적절한 한국어 모델
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForCausalLM.from_pretrained(model_name)
-
-# 데이터 전처리
-def preprocess_function(examples):
-    return tokenizer(examples["text"], truncation=True, padding="max_length", max_length=512)
-
-tokenized_dataset = dataset.map(preprocess_function, batched=True)
-
-# 학습 설정
-training_args = TrainingArguments(
-    output_dir="./results",
-    num_train_epochs=3,
-    per_device_train_batch_size=4,
-    save_steps=1000,
-    save_total_limit=2,
-)
-
-# 트레이너 초기화 및 학습
-trainer = Trainer(
-    model=model,
-    args=training_args,
-    train_dataset=tokenized_dataset,
-)
-
-trainer.train()
-
-# 모델 저장
-model.save_pretrained("./fine_tuned_debate_model")
-tokenizer.save_pretrained("./fine_tuned_debate_model")
\ No newline at end of file
+
+_tokenizers = {}
+
+def load_tokenizer(model_name=model_name):
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    # 동적 패딩에 pad 토큰이 필요 (없는 토크나이저는 eos로 채우고 loss에서는 제외됨)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer
+
+class PackedCollator:
+    # 패킹한 블록을 배치로 묶는다. 마지막 짧은 블록만 패딩이 생기고 그 자리는 attention/labels에서 제외.
+    # document_mask=True면 블록 안의 문서끼리 서로 보지 않도록 문서별 causal mask를 이어 붙인 4D 마스크
+    # (batch, 1, L, L; 더하는 값이라 볼 수 있는 자리 0, 아니면 dtype 최솟값)를 만든다.
+    # 문서 경계는 position_ids가 0으로 돌아가는 자리(TokenBlockDataset/StreamingTextDataset이 넣어 줌)다.
+    def __init__(self, pad_token_id, document_mask=True, dtype=torch.float32):
+        self.pad_token_id = pad_token_id
+        self.document_mask = document_mask
+        self.dtype = dtype
+
+    def __call__(self, features):
+        longest = max(len(feature["input_ids"]) for feature in features)
+        shape = (len(features), longest)
+        batch = {
+            "input_ids": torch.full(shape, self.pad_token_id, dtype=torch.long),
+            "attention_mask": torch.zeros(shape, dtype=torch.long),
+            "position_ids": torch.zeros(shape, dtype=torch.long),
+            "labels": torch.full(shape, -100, dtype=torch.long),
+        }
+        for row, feature in enumerate(features):
+            length = len(feature["input_ids"])
+            batch["attention_mask"][row, :length] = 1
+            for key in ("input_ids", "position_ids", "labels"):
+                batch[key][row, :length] = torch.from_numpy(np.asarray(feature[key], dtype=np.int64))
+        if self.document_mask:
+            batch["attention_mask"] = document_attention_mask(batch["position_ids"], batch["attention_mask"],
+                                                              self.dtype)
+        return batch
+
+def document_attention_mask(position_ids, padding_mask, dtype=torch.float32):
+    # 같은 문서 안에서 자기 자리까지만 볼 수 있는 블록 대각 causal mask.
+    # 패딩 자리(query)는 첫 토큰만 보게 해서 softmax가 NaN이 되지 않게 한다 (labels가 -100이라 loss에는 영향 없음).
+    # 그래서 대각 성분이 1인 자리 수가 실제 토큰 수다 (training_telemetry.py가 이 값으로 센다).
+    segments = torch.cumsum(position_ids == 0, dim=1)
+    length = position_ids.shape[1]
+    causal = torch.ones(length, length, dtype=torch.bool).tril()
+    real = padding_mask.bool()
+    allowed = (segments[:, :, None] == segments[:, None, :]) & causal & real[:, :, None] & real[:, None, :]
+    allowed[:, :, 0] |= ~real
+    mask = torch.zeros(allowed.shape, dtype=dtype).masked_fill_(~allowed, torch.finfo(dtype).min)
+    return mask[:, None]
+
+def make_collator(tokenizer, packed=False):
+    if packed:
+        return PackedCollator(tokenizer.pad_token_id)
+    # 배치마다 가장 긴 샘플 길이(8의 배수)까지만 패딩하고, labels는 input_ids에서 패딩을 -100으로 바꿔 만든다
+    return DataCollatorForLanguageModeling(tokenizer, mlm=False, pad_to_multiple_of=8)
+
+def tokenizer_fingerprint(tokenizer):
+    # 어휘/병합 규칙/특수 토큰이 같으면 같은 값
+    if getattr(tokenizer, "is_fast", False):
+        spec = tokenizer.backend_tokenizer.to_str()
+    else:
+        spec = json.dumps(sorted(tokenizer.get_vocab().items()), ensure_ascii=False)
+    digest = hashlib.sha256(spec.encode("utf-8"))
+    digest.update(json.dumps(tokenizer.special_tokens_map, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+def encode_article(article, model_name=model_name):
+    # 작업 프로세스마다 토크나이저를 한 번만 불러서 기사 하나를 토큰화 (끝에 EOS)
+    tokenizer = _tokenizers.get(model_name)
+    if tokenizer is None:
+        tokenizer = _tokenizers[model_name] = load_tokenizer(model_name)
+    ids = tokenizer(format_record(article))["input_ids"]
+    return np.asarray(ids + [tokenizer.eos_token_id], dtype=np.int32)
+
+def encode_record(record, model_name=model_name):
+    # (문서 id, 토큰) - 토큰 샤드에 id를 남겨서 코퍼스 delta로 바뀐 문서만 갈아 끼운다
+    return record_id(record), encode_article(record, model_name)
+
+def tokenize_corpus(corpus_path=corpus_path, output_dir=dataset_dir, model_name=model_name, num_proc=None,
+                    delta_dir='cleaned_articles.deltas'):
+    # 코퍼스 전체를 한 번만 토큰화해서 memmap 토큰 샤드로 남긴다. 자르거나 패딩하지 않고
+    # (블록 크기/최대 길이는 학습 때 정함) 토크나이저와 코퍼스가 그대로면 다시 토큰화하지 않는다.
+    tokenizer = load_tokenizer(model_name)
+    fingerprints = {"tokenizer": tokenizer_fingerprint(tokenizer), "corpus": corpus_fingerprint(corpus_path)}
+    key = hashlib.sha256(json.dumps(fingerprints).encode("utf-8")).hexdigest()
+    if cached_key(output_dir) == key:
+        print(f"Token shards in '{output_dir}/' are up to date")
+        return TokenShards(output_dir).manifest
+
+    # 토크나이저가 같고 지난번 토큰화한 코퍼스에서 지금 코퍼스까지의 delta가 모두 남아 있으면
+    # 추가/변경된 기사만 토큰화하고 나머지는 기존 샤드의 토큰을 그대로 옮긴다
+    cached = open_cached(output_dir)
+    deltas = None
+    if (cached is not None and delta_dir and cached.manifest.get("tokenizer") == fingerprints["tokenizer"]
+            and cached.doc_ids() is not None):
+        deltas = deltas_between(delta_dir, cached.manifest.get("corpus"), fingerprints["corpus"])
+
+    encode = partial(encode_record, model_name=model_name)
+    with TokenShardWriter(output_dir, token_dtype(len(tokenizer)), key=key, meta=fingerprints) as writer:
+        if deltas is not None:
+            upserts, removed = load_delta(*deltas)
+            # 바뀐 기사 토큰만 메모리에 두고, 기존 순서대로 갈아 끼운 뒤 새 기사는 끝에 붙인다 (apply_delta와 같은 순서)
+            encoded = dict(parallel_map(encode, upserts.values(), workers=num_proc, chunksize=32))
+            for index, doc_id in enumerate(cached.doc_ids().tolist()):
+                if doc_id in removed:
+                    continue
+                writer.write(encoded.pop(doc_id) if doc_id in encoded else cached.doc(index), doc_id)
+            for doc_id, ids in encoded.items():
+                writer.write(ids, doc_id)
+        else:
+            # 기사를 한 건씩 읽어 num_proc개 프로세스에서 토큰화하고 받는 대로 샤드에 씀 (전체를 메모리에 올리지 않음)
+            for doc_id, ids in parallel_map(encode, iter_records(corpus_path), workers=num_proc, chunksize=32):
+                writer.write(ids, doc_id)
+    manifest = writer.close()
+    if deltas is not None:
+        print(f"Updated token shards from {len(deltas)} corpus deltas: {len(upserts)} articles re-tokenized, "
+              f"{len(removed)} removed, {manifest['docs']} articles in '{output_dir}/'")
+    else:
+        print(f"Tokenized {manifest['docs']} articles into {manifest['tokens']} tokens in '{output_dir}/'")
+    return manifest
+
+def load_train_dataset(dataset_dir=dataset_dir, pack=True, block_size=512, max_length=512):
+    # 토큰 샤드를 memmap으로 열기만 하므로 코퍼스 크기와 관계없이 바로 시작
+    shards = TokenShards(dataset_dir)
+    return TokenBlockDataset(shards, block_size) if pack else TokenDocDataset(shards, max_length)
+
+def add_lora_adapters(model, rank=8, alpha=16, dropout=0.05, target_modules=("c_attn",)):
+    # 기본 가중치는 얼리고 attention 투영(c_attn)에 저랭크 어댑터만 붙여 학습 (peft 필요)
+    peft = import_peft()
+    config = peft.LoraConfig(task_type="CAUSAL_LM", r=rank, lora_alpha=alpha, lora_dropout=dropout,
+                        target_modules=list(target_modules),
+                        # GPT-2 계열은 Linear 대신 (in, out) 모양의 Conv1D를 쓴다
+                        fan_in_fan_out=True)
+    model = peft.get_peft_model(model, config)
+    model.print_trainable_parameters()
+    return model
+
+def length_grouping(enabled):
+    # transformers 5부터 group_by_length 대신 train_sampling_strategy="group_by_length"
+    if not enabled:
+        return {}
+    if 'train_sampling_strategy' in TrainingArguments.__dataclass_fields__:
+        return {'train_sampling_strategy': 'group_by_length'}
+    return {'group_by_length': True}
+
+def train(dataset_dir=dataset_dir, output_dir=model_dir, model_name=model_name, num_train_epochs=3,
+          per_device_train_batch_size=4, save_steps=1000, save_total_limit=2, pack=True, block_size=512,
+          max_length=512, streaming_sources=None, streaming_weights=None, max_steps=-1, buffer_size=10000,
+          dataloader_num_workers=0, global_batch_size=None, save_model=True, lora_rank=None, lora_alpha=16,
+          merged_dir=None, telemetry_path='training_telemetry.jsonl', telemetry_baseline=None,
+          gradient_checkpointing=False):
+    # 모델 및 토크나이저 초기화 (한국어 모델 사용)
+    tokenizer = load_tokenizer(model_name)
+    model = AutoModelForCausalLM.from_pretrained(model_name)
+    # lora_rank를 주면 어댑터만 학습하고 output_dir에는 어댑터(수 MB)만 저장
+    if lora_rank:
+        model = add_lora_adapters(model, lora_rank, lora_alpha)
+    if streaming_sources:
+        # 스트리밍 모드: 토큰 샤드 없이 코퍼스들을 읽으면서 바로 토큰화/패킹 (길이를 모르므로 max_steps 필요)
+        if max_steps <= 0:
+            raise ValueError("max_steps is required when training from streaming_sources")
+        tokenized_dataset = StreamingTextDataset(streaming_sources, tokenizer, streaming_weights, block_size,
+                                                 buffer_size)
+        pack = True
+    else:
+        tokenized_dataset = load_train_dataset(dataset_dir, pack, block_size, max_length)
+
+    # cpu_ddp.py로 여러 프로세스를 띄우면 WORLD_SIZE가 설정된다. global_batch_size를 주면
+    # 프로세스 수가 달라져도 (배치 x 누적 스텝 x 프로세스 수)가 같도록 gradient accumulation을 맞춘다.
+    world_size = int(os.environ.get("WORLD_SIZE", "1"))
+    accumulation = 1
+    if global_batch_size:
+        per_step = per_device_train_batch_size * world_size
+        if global_batch_size % per_step:
+            raise ValueError(f"global_batch_size {global_batch_size} is not a multiple of "
+                             f"{per_device_train_batch_size} x {world_size} processes")
+        accumulation = global_batch_size // per_step
+
+    # 학습 설정
+    training_args = TrainingArguments(
+        output_dir="./results",
+        num_train_epochs=num_train_epochs,
+        per_device_train_batch_size=per_device_train_batch_size,
+        save_steps=save_steps,
+        save_total_limit=save_total_limit,
+        max_steps=max_steps,
+        dataloader_num_workers=dataloader_num_workers,
+        gradient_accumulation_steps=accumulation,
+        # GPU가 없는 학습 서버: 여러 프로세스일 때는 gloo로 그래디언트를 모은다
+        use_cpu=True,
+        ddp_backend="gloo" if world_size > 1 else None,
+        # 길이가 비슷한 샘플끼리 배치를 묶어서 패딩을 줄임 (패킹한 블록은 길이가 모두 같아서 필요 없음)
+        **length_grouping(not pack),
+        # 층마다 활성값을 저장하지 않고 역전파 때 다시 계산 (메모리 대신 계산 ~30% 추가, memory_planner.py 참고)
+        gradient_checkpointing=gradient_checkpointing,
+        # non-reentrant 방식은 입력에 grad가 없어도(LoRA로 임베딩을 얼린 경우) 역전파가 이어진다
+        gradient_checkpointing_kwargs={"use_reentrant": False} if gradient_checkpointing else None,
+    )
+
+    # 스텝마다 토큰 처리량/단계별 시간/패딩 비율/최대 RSS를 기록 (telemetry_baseline과 비교해 느려지면 표시)
+    telemetry = TrainingTelemetry(telemetry_path, telemetry_baseline)
+
+    # 트레이너 초기화 및 학습
+    trainer = TelemetryTrainer(
+        model=model,
+        args=training_args,
+        train_dataset=tokenized_dataset,
+        data_collator=make_collator(tokenizer, pack),
+        telemetry=telemetry,
+    )
+
+    result = trainer.train()
+    metrics = dict(result.metrics)
+    # 스텝당 시간과 최대 메모리(RSS)로 전체 학습/LoRA 학습을 비교
+    metrics["seconds_per_step"] = metrics["train_runtime"] / max(1, result.global_step)
+    metrics["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    summary = telemetry.summary()
+    metrics.update({key: summary[key] for key in ("tokens_per_second", "pad_fraction") if key in summary})
+
+    # 모델 저장 (여러 프로세스로 학습했으면 rank 0만)
+    if save_model and trainer.is_world_process_zero():
+        model.save_pretrained(output_dir)
+        tokenizer.save_pretrained(output_dir)
+        # 어댑터를 합친 전체 모델도 필요하면 따로 저장
+        if lora_rank and merged_dir:
+            model.merge_and_unload().save_pretrained(merged_dir)
+            tokenizer.save_pretrained(merged_dir)
+    return metrics
+
+if __name__ == "__main__":
+    tokenize_corpus()
+    train()
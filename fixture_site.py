@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import hashlib
+import random
+import threading
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+from discovery import SITEMAP_NS
+from extractors import BLOG_POSTING
+from html_archive import load_index, read_response
+
+LISTING_PATH = '/category/debate/page/{}/'
+
+_SYLLABLES = '토론 주제 찬성 반대 근거 반박 논제 쟁점 정책 가치 사실 교육 사회 자유 평등 민주 결정 의사 소통 논리 판단 입장 주장'.split()
+
+_PAGE = """<!DOCTYPE html>
+<html lang="ko-KR"><head><meta charset="UTF-8"><title>{title} | 리얼디베이트</title>
+<style>body {{ font-family: sans-serif; }}</style><script>var ajaxurl = "/wp-admin/admin-ajax.php";</script></head>
+<body><header id="masthead"><nav>{nav}</nav></header>
+<main id="main">{main}</main>
+<footer id="colophon">{footer}</footer></body></html>"""
+
+
+class FixtureSite:
+    # realdebate.co.kr 구조(목록의 article[itemtype=BlogPosting], 기사의 entry-title/entry-content)를 흉내내는 로컬 서버.
+    # 응답 지연과 오류를 주입할 수 있고, archive_dir을 주면 실제로 보관한 페이지를 그대로 다시 보여준다.
+    def __init__(self, pages=11, per_page=10, latency=0.0, error_rate=0.0, retry_after=None,
+                 crawl_delay=None, paragraphs=12, archive_dir=None, listing_path=LISTING_PATH, seed=0,
+                 feed=False, sitemap=False):
+        self.pages = pages
+        self.per_page = per_page
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.crawl_delay = crawl_delay
+        self.paragraphs = paragraphs
+        self.listing_path = listing_path
+        # feed/sitemap을 켜면 카테고리 RSS(.../feed/?paged=N)와 wp-sitemap.xml(기사별 lastmod)도 내보낸다
+        self.feed = feed
+        self.sitemap = sitemap
+        # 기사 번호 -> 수정 횟수. 값을 올리면 본문과 사이트맵 lastmod가 바뀐다
+        self.revisions = {}
+        self.random = random.Random(seed)
+        self.recorded = self._load_recorded(archive_dir) if archive_dir else None
+        self.base_url = None
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def listing_url(self):
+        return self.base_url + self.listing_path
+
+    def _load_recorded(self, archive_dir):
+        # 보관한 페이지를 경로 기준으로 저장. 원래 사이트 주소는 서버 주소로 바꿔서 내보낸다.
+        recorded = {}
+        for url, entry in load_index(archive_dir).items():
+            status, html = read_response(archive_dir, entry)
+            if status == 200:
+                parts = urlsplit(url)
+                recorded[parts.path] = (f"{parts.scheme}://{parts.netloc}", html)
+        return recorded
+
+    def _text(self, rng, words):
+        return ' '.join(rng.choice(_SYLLABLES) for _ in range(words))
+
+    def listing_page(self, page):
+        rng = random.Random(page)
+        nav = ''.join(f'<a href="/category/{i}/">{self._text(rng, 2)}</a>' for i in range(20))
+        articles = []
+        for i in range(self.per_page):
+            post = (page - 1) * self.per_page + i
+            articles.append(
+                f'<article id="post-{post}" itemscope itemtype="{BLOG_POSTING}">'
+                f'<header><h1 class="entry-title" itemprop="headline"><a href="/post/{post}/">{self._text(rng, 6)}</a></h1></header>'
+                f'<div class="entry-summary"><p>{self._text(rng, 40)}</p></div></article>')
+        return _PAGE.format(title=f"page {page}", nav=nav, main=''.join(articles), footer=self._text(rng, 30))
+
+    def article_page(self, post):
+        rng = random.Random(10_000 + post)
+        title = f"{self._text(rng, 5)} {post}"
+        nav = ''.join(f'<a href="/category/{i}/">{self._text(rng, 2)}</a>' for i in range(20))
+        body = ''.join(f'<p>{self._text(rng, rng.randint(40, 120))}.</p>' for _ in range(self.paragraphs))
+        revision = self.revisions.get(post, 0)
+        if revision:
+            body += f'<p>수정 {revision}: {self._text(random.Random(post * 100 + revision), 60)}.</p>'
+        main = (f'<article itemscope itemtype="{BLOG_POSTING}"><header><h1 class="entry-title">{title}</h1></header>'
+                f'<div class="entry-content">{body}<script>console.log({post});</script></div></article>'
+                f'<aside class="widget">{self._text(rng, 80)}</aside>')
+        return _PAGE.format(title=title, nav=nav, main=main, footer=self._text(rng, 30))
+
+    @property
+    def feed_path(self):
+        return self.listing_path.split('page/{}')[0] + 'feed/'
+
+    def feed_page(self, page):
+        # 최신 글부터 목록 페이지와 같은 단위로 나눈 RSS 2.0
+        if not 1 <= page <= self.pages:
+            return None
+        items = ''.join(f'<item><title>post {post}</title><link>{self.base_url}/post/{post}/</link></item>'
+                        for post in range((page - 1) * self.per_page, page * self.per_page))
+        return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>{items}</channel></rss>'
+
+    def sitemap_page(self):
+        urls = ''.join(f'<url><loc>{self.base_url}/post/{post}/</loc>'
+                       f'<lastmod>2024-01-{1 + self.revisions.get(post, 0):02d}T00:00:00+00:00</lastmod></url>'
+                       for post in range(self.pages * self.per_page))
+        return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{SITEMAP_NS[1:-1]}">{urls}</urlset>'
+
+    async def handle(self, request):
+        if self.latency:
+            await asyncio.sleep(self.latency * self.random.uniform(0.5, 1.5))
+        path = request.rel_url.raw_path
+
+        if path == '/robots.txt':
+            delay = f"Crawl-delay: {self.crawl_delay}\n" if self.crawl_delay else ''
+            return web.Response(text=f"User-agent: *\n{delay}Allow: /\n")
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            headers = {'Retry-After': str(self.retry_after)} if self.retry_after is not None else {}
+            status = 429 if self.retry_after is not None else 503
+            return web.Response(status=status, headers=headers)
+
+        content_type = 'text/html'
+        if self.feed and path == self.feed_path:
+            paged = request.rel_url.query.get('paged', '1')
+            html = self.feed_page(int(paged)) if paged.isdigit() else None
+            content_type = 'application/rss+xml'
+        elif self.sitemap and path == '/wp-sitemap.xml':
+            html = self.sitemap_page()
+            content_type = 'application/xml'
+        else:
+            html = self._render(path)
+        if html is None:
+            raise web.HTTPNotFound()
+        etag = '"%s"' % hashlib.md5(html.encode('utf-8')).hexdigest()
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=html, content_type=content_type, charset='utf-8', headers={'ETag': etag})
+
+    def _render(self, path):
+        if self.recorded is not None:
+            origin, html = self.recorded.get(path, (None, None))
+            return html.replace(origin, self.base_url) if html is not None else None
+        parts = path.strip('/').split('/')
+        if path.startswith('/category/debate/page/') and len(parts) == 4 and parts[3].isdigit():
+            page = int(parts[3])
+            return self.listing_page(page) if 1 <= page <= self.pages else None
+        if parts[0] == 'post' and len(parts) == 2 and parts[1].isdigit():
+            post = int(parts[1])
+            return self.article_page(post) if post < self.pages * self.per_page else None
+        return None
+
+    def start(self, host='127.0.0.1', port=0):
+        # 별도 스레드의 이벤트 루프에서 서버를 띄워서, 같은 프로세스의 크롤러가 asyncio.run을 써도 되게 함
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            app = web.Application()
+            app.router.add_get('/{tail:.*}', self.handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, host, port)
+            self._loop.run_until_complete(site.start())
+            self.base_url = f"http://{host}:{self._runner.addresses[0][1]}"
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.base_url
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local fixture site shaped like realdebate.co.kr")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--pages', type=int, default=11)
+    parser.add_argument('--per-page', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--archive', default=None, help="serve pages recorded in this raw archive")
+    parser.add_argument('--listing-path', default=LISTING_PATH)
+    parser.add_argument('--feed', action='store_true', help="also serve a category RSS feed")
+    parser.add_argument('--sitemap', action='store_true', help="also serve /wp-sitemap.xml")
+    args = parser.parse_args()
+
+    site = FixtureSite(pages=args.pages, per_page=args.per_page, latency=args.latency,
+                       error_rate=args.error_rate, archive_dir=args.archive, listing_path=args.listing_path,
+                       feed=args.feed, sitemap=args.sitemap)
+    site.start(port=args.port)
+    print(f"Fixture site running at {site.listing_url.format(1)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
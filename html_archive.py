@@ -0,0 +1,120 @@
+import codecs
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+
+INDEX_NAME = 'index.cdxj'
+
+# 본문은 압축 해제된 상태로 보관하므로 전송 관련 헤더는 남기지 않는다
+_SKIP_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+
+
+class HtmlArchive:
+    # 받은 원본 응답을 WARC/1.0 response 레코드로 압축 보관하는 추가 전용(append-only) 아카이브.
+    # 레코드마다 별도의 gzip member라서 index.cdxj의 (파일, 오프셋, 길이)로 바로 꺼낼 수 있다.
+    def __init__(self, archive_dir='raw_archive', max_bytes=1 << 30):
+        self.archive_dir = archive_dir
+        self.max_bytes = max_bytes
+        os.makedirs(archive_dir, exist_ok=True)
+        existing = sorted(name for name in os.listdir(archive_dir) if name.endswith('.warc.gz'))
+        self.file_number = int(existing[-1].split('-')[1].split('.')[0]) if existing else 0
+        self._file = None
+        index_path = os.path.join(archive_dir, INDEX_NAME)
+        # 이미 보관한 URL (캐시만 있고 아카이브에는 없는 페이지를 채워 넣을 때 확인)
+        self.urls = set(load_index(archive_dir)) if os.path.exists(index_path) else set()
+        self._index = open(index_path, 'a', encoding='utf-8')
+
+    def __contains__(self, url):
+        return url in self.urls
+
+    def _current_file(self):
+        if self._file is not None and self._file.tell() >= self.max_bytes:
+            self._file.close()
+            self._file = None
+            self.file_number += 1
+        if self._file is None:
+            name = f"archive-{self.file_number:05d}.warc.gz"
+            self._file = open(os.path.join(self.archive_dir, name), 'ab')
+        return self._file
+
+    def write(self, url, status, reason, headers, body):
+        # headers: (이름, 값) 쌍들, body: 원본 바이트
+        date = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        http_head = f"HTTP/1.1 {status} {reason or ''}\r\n"
+        http_head += ''.join(f"{name}: {value}\r\n" for name, value in headers
+                             if name.lower() not in _SKIP_HEADERS)
+        http_head += f"Content-Length: {len(body)}\r\n"
+        block = (http_head + '\r\n').encode('utf-8', errors='replace') + body
+        warc_head = (
+            "WARC/1.0\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+            f"WARC-Date: {date}\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            "Content-Type: application/http;msgtype=response\r\n"
+            f"Content-Length: {len(block)}\r\n"
+            "\r\n"
+        ).encode('utf-8')
+        member = gzip.compress(warc_head + block + b'\r\n\r\n')
+
+        f = self._current_file()
+        offset = f.tell()
+        f.write(member)
+        f.flush()
+        entry = {'url': url, 'date': date, 'status': status, 'file': os.path.basename(f.name),
+                 'offset': offset, 'length': len(member)}
+        self._index.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._index.flush()
+        self.urls.add(url)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._index.close()
+
+
+def iter_index(archive_dir='raw_archive'):
+    # 보관한 순서대로 모든 레코드 위치 (같은 URL을 여러 번 보관했으면 모두)
+    with open(os.path.join(archive_dir, INDEX_NAME), 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_index(archive_dir='raw_archive'):
+    # URL별로 가장 최근에 보관한 레코드 위치
+    return {entry['url']: entry for entry in iter_index(archive_dir)}
+
+
+def _header(head, wanted):
+    for line in head.decode('utf-8', errors='replace').split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        if name.strip().lower() == wanted:
+            return value.strip()
+    return ''
+
+
+def _charset(content_type):
+    for part in content_type.split(';')[1:]:
+        key, _, value = part.strip().partition('=')
+        if key.lower() == 'charset' and value:
+            try:
+                return codecs.lookup(value.strip('"\'')).name
+            except LookupError:
+                break
+    return 'utf-8'
+
+
+def read_response(archive_dir, entry):
+    # 아카이브 레코드 하나를 읽어 (상태 코드, 디코딩된 본문)으로 돌려준다
+    with open(os.path.join(archive_dir, entry['file']), 'rb') as f:
+        f.seek(entry['offset'])
+        record = gzip.decompress(f.read(entry['length']))
+    warc_head, _, block = record.partition(b'\r\n\r\n')
+    block = block[:int(_header(warc_head, 'content-length'))]
+    http_head, _, body = block.partition(b'\r\n\r\n')
+    status = int(http_head.split(b'\r\n', 1)[0].split()[1])
+    return status, body.decode(_charset(_header(http_head, 'content-type')), errors='replace')
@@ -0,0 +1,55 @@
+import hashlib
+import json
+import os
+
+
+class HttpCache:
+    # URL별로 응답 본문과 검증자(ETag / Last-Modified)를 디스크에 저장하는 조건부 GET 캐시
+    def __init__(self, cache_dir='.http_cache'):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def load_meta(self, url):
+        try:
+            with open(self._path(url) + '.json', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def load_body(self, url):
+        try:
+            with open(self._path(url) + '.html', 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def conditional_headers(self, url):
+        meta = self.load_meta(url)
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, url, body, headers):
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        # 검증자가 없는 응답은 다음 요청에서 재사용할 수 없으므로 저장하지 않음
+        if not etag and not last_modified:
+            return
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = {'url': url, 'etag': etag, 'last_modified': last_modified}
+        # 본문을 먼저 쓰고 메타데이터를 나중에 교체해서, 중간에 죽어도 짝이 어긋난 캐시가 남지 않게 함
+        for suffix, write in (('.html', lambda f: f.write(body)),
+                              ('.json', lambda f: json.dump(meta, f, ensure_ascii=False))):
+            tmp_path = path + suffix + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                write(f)
+            os.replace(tmp_path, path + suffix)
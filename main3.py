@@ -4,7 +4,8 @@ from dotenv import load_dotenv
 from anthropic import Anthropic
 import sys
 import io
-from transformers import AutoTokenizer, AutoModelForCausalLM
+
+from finetuned_model import load_finetuned_model
 
 sys.stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -16,9 +17,8 @@ if not api_key:
     raise ValueError("API key not found. Make sure it's set in your .env file.")
 client = Anthropic(api_key=api_key)
 
-# 파인튜닝된 모델 로드
-tokenizer = AutoTokenizer.from_pretrained("./fine_tuned_debate_model")
-model = AutoModelForCausalLM.from_pretrained("./fine_tuned_debate_model")
+# 파인튜닝된 모델 로드 (전체 모델 또는 LoRA 어댑터. 어댑터는 기본 모델에 합쳐서 사용)
+tokenizer, model = load_finetuned_model("./fine_tuned_debate_model")
 
 # JSON 파일에서 토론 주제 데이터 로드
 with open('debate_topics.json', 'r', encoding='utf-8') as f:
@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+import resource
+import time
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+
+from finetuning import add_lora_adapters, model_name
+
+# 프로파일링할 (시퀀스 길이, 마이크로 배치) 지점. 작게 재고 큰 설정은 적합한 식으로 외삽한다
+PROFILE_POINTS = [(128, 1), (256, 1), (256, 2), (512, 1)]
+
+
+def _features(seq_len, batch):
+    # 메모리/시간 = 고정분(가중치, 옵티마이저 상태) + 토큰 수에 비례(층별 활성값) + 길이 제곱에 비례(attention 점수)
+    return [1.0, seq_len * batch, seq_len * seq_len * batch]
+
+
+def _profile_worker(queue, model_name, seq_len, batch, checkpointing, lora_rank, steps):
+    from transformers import AutoModelForCausalLM
+    model = AutoModelForCausalLM.from_pretrained(model_name)
+    if lora_rank:
+        model = add_lora_adapters(model, lora_rank)
+    if checkpointing:
+        model.config.use_cache = False
+        model.gradient_checkpointing_enable(gradient_checkpointing_kwargs={"use_reentrant": False})
+    model.train()
+    optimizer = torch.optim.AdamW([p for p in model.parameters() if p.requires_grad], lr=1e-5)
+    input_ids = torch.randint(model.config.vocab_size, (batch, seq_len))
+    times = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        model(input_ids=input_ids, labels=input_ids).loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+        times.append(time.perf_counter() - start)
+    # 첫 스텝은 옵티마이저 상태 할당이 섞여서 시간은 마지막 스텝으로
+    queue.put((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, times[-1]))
+
+
+def profile(seq_len, batch, checkpointing=False, lora_rank=None, model_name=model_name, steps=2):
+    # 새 프로세스에서 학습 스텝을 steps번 돌리고 그 프로세스의 최대 RSS(MB)와 스텝 시간을 잰다
+    # (최대 RSS는 프로세스마다 한 번만 올라가므로 설정마다 따로 띄운다)
+    context = mp.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_profile_worker,
+                              args=(queue, model_name, seq_len, batch, checkpointing, lora_rank, steps))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"Profiling seq_len={seq_len} batch={batch} failed (exit code {process.exitcode})")
+    peak_mb, seconds = queue.get()
+    return {'seq_len': seq_len, 'batch': batch, 'checkpointing': checkpointing, 'peak_mb': peak_mb,
+            'seconds_per_step': seconds}
+
+
+def fit(samples, key):
+    x = np.array([_features(sample['seq_len'], sample['batch']) for sample in samples])
+    y = np.array([sample[key] for sample in samples])
+    coefficients = np.linalg.lstsq(x, y, rcond=None)[0]
+    # 측정 잡음으로 증가분 계수가 음수가 되면 큰 설정을 과소평가하므로 0으로
+    coefficients[1:] = np.maximum(coefficients[1:], 0)
+    return coefficients
+
+
+def predict(coefficients, seq_len, batch):
+    return float(np.dot(coefficients, _features(seq_len, batch)))
+
+
+def profile_models(lora_rank=None, model_name=model_name, points=PROFILE_POINTS, steps=2):
+    # 체크포인팅 끔/켬 각각 메모리와 스텝 시간 모델을 만든다
+    models = {}
+    for checkpointing in (False, True):
+        samples = [profile(seq_len, batch, checkpointing, lora_rank, model_name, steps) for seq_len, batch in points]
+        for sample in samples:
+            print(f"  seq {sample['seq_len']:>5} x batch {sample['batch']} checkpointing={checkpointing!s:<5} "
+                  f"peak {sample['peak_mb']:.0f} MB, {sample['seconds_per_step']:.2f}s/step")
+        models[checkpointing] = {'peak_mb': fit(samples, 'peak_mb'),
+                                 'seconds_per_step': fit(samples, 'seconds_per_step')}
+    return models
+
+
+def plan(budget_mb, models, global_batch_size=16, seq_lengths=(1024, 768, 512, 256), micro_batches=(8, 4, 2, 1),
+         procs=1, headroom=0.9):
+    # 프로세스당 예산(budget_mb / procs)의 headroom 안에 들어가는 설정 중 가장 긴 시퀀스를 고르고,
+    # 같은 길이에서는 예측한 옵티마이저 스텝 시간(마이크로 배치 시간 x 누적 스텝)이 가장 짧은 설정을 고른다
+    # (체크포인팅은 재계산만큼 느리지만 더 큰 마이크로 배치로 누적 스텝을 줄일 수 있다).
+    limit = budget_mb / procs * headroom
+    for seq_len in sorted(seq_lengths, reverse=True):
+        candidates = []
+        for checkpointing in (False, True):
+            for batch in micro_batches:
+                if global_batch_size % (batch * procs):
+                    continue
+                peak_mb = predict(models[checkpointing]['peak_mb'], seq_len, batch)
+                if peak_mb > limit:
+                    continue
+                accumulation = global_batch_size // (batch * procs)
+                candidates.append({
+                    'block_size': seq_len,
+                    'max_length': seq_len,
+                    'per_device_train_batch_size': batch,
+                    'global_batch_size': global_batch_size,
+                    'gradient_checkpointing': checkpointing,
+                    'accumulation_steps': accumulation,
+                    'predicted_peak_mb': peak_mb,
+                    'predicted_seconds_per_step': predict(models[checkpointing]['seconds_per_step'], seq_len,
+                                                          batch) * accumulation,
+                })
+        if candidates:
+            return min(candidates, key=lambda candidate: candidate['predicted_seconds_per_step'])
+    return None
+
+
+def total_ram_mb():
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile a few short training steps and pick the longest sequence "
+                                                 "length, micro-batch and accumulation that fit a RAM budget")
+    parser.add_argument('--budget-mb', type=float, default=None, help="RAM budget (default: 80%% of physical RAM)")
+    parser.add_argument('--model', default=model_name)
+    parser.add_argument('--global-batch-size', type=int, default=16)
+    parser.add_argument('--procs', type=int, default=1, help="data-parallel processes sharing the budget (cpu_ddp.py)")
+    parser.add_argument('--lora-rank', type=int, default=None)
+    parser.add_argument('--seq-lengths', default='1024,768,512,256')
+    parser.add_argument('--output', default=None, help="write the plan as a run_pipeline.py --config file")
+    args = parser.parse_args()
+
+    from transformers import AutoConfig
+    # 모델의 위치 임베딩 수보다 긴 시퀀스는 학습할 수 없음 (kogpt2: 1024)
+    max_positions = AutoConfig.from_pretrained(args.model).n_positions
+    seq_lengths = [length for length in map(int, args.seq_lengths.split(',')) if length <= max_positions]
+    budget_mb = args.budget_mb or total_ram_mb() * 0.8
+
+    print(f"Profiling {args.model} ({len(PROFILE_POINTS)} points x 2 modes)...")
+    models = profile_models(args.lora_rank, args.model)
+    chosen = plan(budget_mb, models, args.global_batch_size, seq_lengths, procs=args.procs)
+    if chosen is None:
+        raise SystemExit(f"No configuration fits {budget_mb:.0f} MB; lower --global-batch-size or --seq-lengths")
+
+    print(f"Budget {budget_mb:.0f} MB over {args.procs} process(es): seq_len {chosen['block_size']}, "
+          f"micro-batch {chosen['per_device_train_batch_size']} x {chosen['accumulation_steps']} accumulation steps, "
+          f"gradient checkpointing {'on' if chosen['gradient_checkpointing'] else 'off'}")
+    print(f"Predicted peak {chosen['predicted_peak_mb']:.0f} MB per process, "
+          f"{chosen['predicted_seconds_per_step']:.1f}s per optimizer step")
+    if args.output:
+        train_config = {key: chosen[key] for key in ('block_size', 'max_length', 'per_device_train_batch_size',
+                                                     'global_batch_size', 'gradient_checkpointing')}
+        if args.lora_rank:
+            train_config['lora_rank'] = args.lora_rank
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'train': train_config}, f, indent=2)
+        print(f"Wrote train config to {args.output} (use: python run_pipeline.py --config {args.output})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+# 2^61 - 1 (메르센 소수). 해시 순열 (a * x + b) mod p 에 사용
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class NearDuplicateDetector:
+    # 문자 n-gram MinHash + LSH 밴딩으로 거의 같은 문서를 찾는다.
+    # 밴드 하나라도 완전히 같으면 후보가 되고, 후보 중 추정 자카드 유사도가 threshold 이상이면 중복으로 본다.
+    def __init__(self, num_perm=128, bands=32, ngram=5, threshold=0.8, min_chars=100, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.threshold = threshold
+        self.min_chars = min_chars
+        rng = np.random.RandomState(seed)
+        # a, b를 31비트로 제한해서 a * x + b (x는 32비트 해시)가 uint64를 넘지 않게 함
+        self.a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self.buckets = [defaultdict(list) for _ in range(bands)]
+        self.signatures = {}
+
+    def shingles(self, text):
+        text = ' '.join(text.split())
+        n = self.ngram
+        if len(text) <= n:
+            grams = {text}
+        else:
+            grams = {text[i:i + n] for i in range(len(text) - n + 1)}
+        return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text):
+        hashes = self.shingles(text)
+        # (num_perm, n_shingles) 행렬에서 순열마다 최솟값
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % _PRIME & _MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows].tobytes() for i in range(self.bands)]
+
+    def is_boilerplate(self, text):
+        # 본문이 거의 없는(공지/목록/빈 페이지) 문서
+        return len(''.join(text.split())) < self.min_chars
+
+    def find_duplicate(self, text, signature=None, ignore=None):
+        # 이미 등록된 문서 중 거의 같은 문서의 key, 없으면 None (ignore: 비교에서 뺄 key, 예: 같은 기사의 예전 버전)
+        signature = self.signature(text) if signature is None else signature
+        candidates = set()
+        for band, key in zip(self.buckets, self._band_keys(signature)):
+            candidates.update(band.get(key, ()))
+        candidates.discard(ignore)
+        for candidate in candidates:
+            if np.mean(self.signatures[candidate] == signature) >= self.threshold:
+                return candidate
+        return None
+
+    def add(self, key, text, signature=None):
+        signature = self.signature(text) if signature is None else signature
+        self.signatures[key] = signature
+        for band, band_key in zip(self.buckets, self._band_keys(signature)):
+            band[band_key].append(key)
+
+    def check(self, key, text):
+        # 중복/상용구 문서면 False, 새 문서면 등록하고 True
+        if self.is_boilerplate(text):
+            return False
+        signature = self.signature(text)
+        if self.find_duplicate(text, signature, ignore=key) is not None:
+            return False
+        self.add(key, text, signature)
+        return True
+
+
+def article_text(article):
+    return f"{article['title']}\n{article['content']}"
+
+
+def drop_near_duplicates(articles, detector=None):
+    # 기사 스트림에서 중복/상용구 기사를 걸러낸다 (먼저 나온 기사를 남김)
+    detector = detector or NearDuplicateDetector()
+    for article in articles:
+        if detector.check(article['url'], article_text(article)):
+            yield article
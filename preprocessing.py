@@ -1,22 +1,44 @@
-import json
+import os
 
-# JSON 파일 로드
-with open('crawled_articles.json', 'r', encoding='utf-8') as f:
-    articles = json.load(f)
+from corpus_delta import apply_delta, diff_corpus, next_delta_path, record_generation, with_stable_id
+from corpus_mmap import write_corpus
+from corpus_shards import corpus_fingerprint, iter_records
+from corpus_pipeline import Pipeline
+from quality_filter import QualityFilter
 
-# 삭제할 인덱스 리스트 (0부터 시작)
-indices_to_remove = [1, 2, 3, 4, 5]
 
-# 역순으로 정렬하여 삭제 (뒤에서부터 삭제해야 앞의 인덱스에 영향을 주지 않음)
-for index in sorted(indices_to_remove, reverse=True):
-    del articles[index]
+def clean_corpus(input_path='crawled_articles', output_dir='cleaned_articles',
+                 delta_dir='cleaned_articles.deltas', **quality_options):
+    # 샤드(또는 기존 JSON/JSONL)에서 한 건씩 읽으면서 너무 짧거나 한글 비율이 낮거나 같은 문장/구절을 반복하는 기사,
+    # 거의 같은 기사/상용구 기사를 건너뛰고 URL 해시로 고정 id를 부여한다 (전체를 메모리에 올리지 않음)
+    quality = QualityFilter(**quality_options)
+    cleaned = (Pipeline.read(input_path)
+               .apply(quality)
+               .dedupe()
+               .map(with_stable_id))
 
-# 남은 항목들 재정렬 (필요한 경우)
-for i, article in enumerate(articles):
-    article['id'] = i + 1  # 1부터 시작하는 새로운 ID 부여
+    # 지난번 결과와 비교해서 추가/변경/삭제분만 delta로 남기고 기존 코퍼스에 반영.
+    # delta는 세대마다 (이전/이후 코퍼스 지문과 함께) 따로 남겨서, 다운스트림(토큰화 캐시 등)이
+    # 몇 번의 실행을 건너뛰었더라도 그동안의 delta를 이어 붙여 바뀐 id만 다시 처리할 수 있다.
+    base = corpus_fingerprint(output_dir) if os.path.exists(output_dir) else None
+    delta_path = next_delta_path(delta_dir)
+    counts = diff_corpus(output_dir, cleaned, delta_path)
+    total = apply_delta(output_dir, delta_path)
+    record_generation(delta_dir, delta_path, base, corpus_fingerprint(output_dir))
 
-# 수정된 데이터를 새 JSON 파일로 저장
-with open('cleaned_articles.json', 'w', encoding='utf-8') as f:
-    json.dump(articles, f, ensure_ascii=False, indent=2)
+    quality.print_report()
+    print(f"Added {counts['added']}, changed {counts['changed']}, removed {counts['removed']} articles")
+    print(f"Cleaned data saved to '{output_dir}/'. Total articles: {total}")
+    return total
 
-print(f"Cleaned data saved to 'cleaned_articles.json'. Total articles: {len(articles)}")
\ No newline at end of file
+
+def build_corpus_index(input_path='cleaned_articles', corpus_path='cleaned_articles.corpus'):
+    # 학습/검색에서 기사 하나를 바로 꺼낼 수 있도록 mmap 코퍼스를 만든다
+    total = write_corpus(iter_records(input_path), corpus_path)
+    print(f"Memory-mapped corpus saved to '{corpus_path}'. Total articles: {total}")
+    return total
+
+
+if __name__ == "__main__":
+    clean_corpus()
+    build_corpus_index()
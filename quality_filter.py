@@ -0,0 +1,199 @@
+from itertools import islice
+
+import numpy as np
+
+FEATURES = ('chars', 'hangul', 'digit', 'latin', 'repeated_lines', 'ngram_repetition')
+
+# 글자 분류표 (BMP 밖 글자는 기타로 취급)
+_NAMES = ('other', 'space', 'hangul', 'digit', 'latin', 'break')
+OTHER, SPACE, HANGUL, DIGIT, LATIN, BREAK = range(len(_NAMES))
+_CLASSES = np.zeros(0x10000, dtype=np.uint8)
+_CLASSES[[9, 11, 12, 13, 32, 0xA0, 0x3000]] = SPACE
+_CLASSES[0xAC00:0xD7A4] = HANGUL
+_CLASSES[0x1100:0x1200] = HANGUL
+_CLASSES[0x3130:0x3190] = HANGUL
+_CLASSES[ord('0'):ord('9') + 1] = DIGIT
+_CLASSES[ord('A'):ord('Z') + 1] = LATIN
+_CLASSES[ord('a'):ord('z') + 1] = LATIN
+# 반복 문장 판정용 구분: 줄바꿈이나 문장 부호에서 자른다 (단어 구분에도 공백으로 쓰임)
+_CLASSES[[10, ord('.'), ord('?'), ord('!')]] = BREAK
+
+# 부분 문자열 해시: 위치 j의 글자에 P^-j를 곱한 누적합 S를 두면 [a, b)의 해시는 (S[b] - S[a]) * P^a.
+# uint64 오버플로(mod 2^64)에서 홀수 P는 역원이 있으므로 순차 루프 없이 한 번에 계산된다.
+_P = np.uint64(0x100000001B3)
+_P_INV = np.uint64(pow(int(_P), -1, 1 << 64))
+# 중복 판정 키의 상위 비트에 배치 안 문서 번호를 넣는다 (배치 크기는 2^_DOC_BITS 이하)
+_DOC_BITS = 20
+_DOC_SHIFT = 64 - _DOC_BITS
+
+
+def _powers(base, count):
+    powers = np.full(count, base, dtype=np.uint64)
+    powers[0] = 1
+    return np.cumprod(powers, dtype=np.uint64)
+
+
+def _duplicates(doc, keys):
+    # (문서, 키)가 같은 항목 중 첫 번째를 뺀 나머지 항목 위치 (키 상위 비트에 문서 번호를 넣어서 한 번만 정렬)
+    # 짧은 단어의 다항식 해시는 하위 비트에만 값이 있으므로 먼저 섞은 뒤 상위 비트를 쓴다 (murmur3 fmix64)
+    keys = keys ^ (keys >> np.uint64(33))
+    keys *= np.uint64(0xFF51AFD7ED558CCD)
+    keys ^= keys >> np.uint64(33)
+    combined = (doc.astype(np.uint64) << np.uint64(_DOC_SHIFT)) | (keys >> np.uint64(_DOC_BITS))
+    order = np.argsort(combined, kind='stable')
+    combined = combined[order]
+    duplicate = np.zeros(len(combined), dtype=bool)
+    duplicate[1:] = combined[1:] == combined[:-1]
+    return order[duplicate]
+
+
+def _runs(flags):
+    # flags가 참인 연속 구간들의 [start, end)
+    edges = np.diff(np.concatenate(([False], flags, [False])).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+class QualityFilter:
+    # 문서를 batch_size개씩 모아서 글자 코드 배열 하나로 만든 뒤 NumPy로 문서별 특징을 한 번에 계산하고,
+    # 기준을 벗어난 문서를 걸러낸다. 통과/탈락과 관계없이 특징 분포와 규칙별 탈락 수를 모아서 보고한다.
+    #   chars: 공백/문장 부호 제외 글자 수, hangul/digit/latin: 그 글자 중 한글/숫자/로마자 비율,
+    #   repeated_lines: 반복된 문장이 차지하는 비율, ngram_repetition: 중복된 단어 n-gram 비율
+    # 기준값을 None으로 주면 그 규칙은 쓰지 않는다.
+    def __init__(self, min_chars=200, max_chars=None, min_hangul=0.6, max_digit=0.15, max_latin=0.2,
+                 max_repeated_lines=0.3, max_ngram_repetition=0.3, ngram=3, batch_size=1024, field='content'):
+        self.rules = {
+            'min_chars': ('chars', min_chars, np.less),
+            'max_chars': ('chars', max_chars, np.greater),
+            'min_hangul': ('hangul', min_hangul, np.less),
+            'max_digit': ('digit', max_digit, np.greater),
+            'max_latin': ('latin', max_latin, np.greater),
+            'max_repeated_lines': ('repeated_lines', max_repeated_lines, np.greater),
+            'max_ngram_repetition': ('ngram_repetition', max_ngram_repetition, np.greater),
+        }
+        self.ngram = ngram
+        self.batch_size = batch_size
+        self.field = field
+        self.seen = 0
+        self.kept = 0
+        self.rejected = {name: 0 for name in self.rules}
+        self._features = []
+        self._powers = np.zeros(0, dtype=np.uint64)
+        self._inverse_powers = self._powers
+
+    def features(self, texts):
+        # 문서 리스트 -> {특징 이름: 문서별 값 배열}. 문서별 파이썬 루프 없이 배치 전체를 한 번에 계산
+        docs = len(texts)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=docs)
+        # 문서 사이에 줄바꿈을 넣어서 단어/문장 구간이 문서 경계를 넘지 않게 함
+        codes = np.frombuffer(('\n'.join(texts) + '\n').encode('utf-32-le'), dtype=np.uint32)
+        classes = _CLASSES[np.minimum(codes, 0xFFFF)]
+        doc_of = np.repeat(np.arange(docs), lengths + 1)
+
+        # 문서별 글자 종류 수를 한 번에 집계 (구분용 줄바꿈 1개는 BREAK에서 뺀다)
+        counts = np.bincount(doc_of * len(_NAMES) + classes, minlength=docs * len(_NAMES)).reshape(docs, -1)
+        counts[:, BREAK] -= 1
+        chars = lengths - counts[:, SPACE] - counts[:, BREAK]
+        denominator = np.maximum(chars, 1)
+
+        # 부분 문자열 해시용 누적합 (거듭제곱 표는 가장 큰 배치 크기로 만들어 두고 재사용)
+        if len(self._powers) <= len(codes):
+            self._inverse_powers = _powers(_P_INV, len(codes) * 2)
+            self._powers = _powers(_P, len(codes) * 2 + 1)
+        prefix = np.zeros(len(codes) + 1, dtype=np.uint64)
+        np.cumsum(codes * self._inverse_powers[:len(codes)], dtype=np.uint64, out=prefix[1:])
+        powers = self._powers
+
+        # 단어 = 공백/문장 구분 문자가 아닌 글자의 연속 구간
+        blank = classes == SPACE
+        blank |= classes == BREAK
+        word_starts, word_ends = _runs(~blank)
+        word_hash = (prefix[word_ends] - prefix[word_starts]) * powers[word_starts]
+        word_doc = doc_of[word_starts]
+
+        n = self.ngram
+        grams = len(word_hash) - n + 1
+        ngram_repetition = np.zeros(docs)
+        if grams > 0:
+            gram_hash = word_hash[:grams].copy()
+            for i in range(1, n):
+                gram_hash *= _P
+                gram_hash += word_hash[i:i + grams]
+            valid = word_doc[:grams] == word_doc[n - 1:]
+            gram_doc = word_doc[:grams][valid]
+            totals = np.bincount(gram_doc, minlength=docs)
+            duplicates = np.bincount(gram_doc[_duplicates(gram_doc, gram_hash[valid])], minlength=docs)
+            # 단어가 n + 1개보다 적은 문서는 반복을 판단하지 않음
+            enough = totals >= 2
+            ngram_repetition[enough] = duplicates[enough] / totals[enough]
+
+        # 문장 = 문장 구분 문자 사이 구간의 첫 단어 시작~마지막 단어 끝 (앞뒤 공백 무시), 무게는 단어 글자 수
+        break_positions = np.flatnonzero(classes == BREAK)
+        segment_of_word = np.searchsorted(break_positions, word_starts)
+        segment_id, first_word = np.unique(segment_of_word, return_index=True)
+        last_word = np.append(first_word[1:], len(word_starts)) - 1
+        nonblank = np.concatenate(([0], np.cumsum(word_ends - word_starts)))
+        segment_weight = (nonblank[last_word + 1] - nonblank[first_word]).astype(np.float64)
+        first, last = word_starts[first_word], word_ends[last_word]
+        segment_hash = (prefix[last] - prefix[first]) * powers[first]
+        segment_doc = word_doc[first_word]
+        repeated_at = _duplicates(segment_doc, segment_hash)
+        repeated = np.bincount(segment_doc[repeated_at], weights=segment_weight[repeated_at], minlength=docs)
+        segment_total = np.bincount(segment_doc, weights=segment_weight, minlength=docs)
+
+        return {
+            'chars': chars,
+            'hangul': counts[:, HANGUL] / denominator,
+            'digit': counts[:, DIGIT] / denominator,
+            'latin': counts[:, LATIN] / denominator,
+            'repeated_lines': np.divide(repeated, segment_total, out=np.zeros(docs), where=segment_total > 0),
+            'ngram_repetition': ngram_repetition,
+        }
+
+    def keep_mask(self, features):
+        keep = np.ones(len(features['chars']), dtype=bool)
+        for name, (feature, threshold, rejects) in self.rules.items():
+            if threshold is None:
+                continue
+            bad = rejects(features[feature], threshold)
+            self.rejected[name] += int(np.count_nonzero(bad))
+            keep &= ~bad
+        return keep
+
+    def filter(self, records):
+        # 파이프라인 단계: 레코드 스트림을 배치로 나눠 판정하고 통과한 레코드만 원래 순서대로 내보낸다
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return
+            features = self.features([record.get(self.field) or '' for record in batch])
+            keep = self.keep_mask(features)
+            self._features.append(np.stack([features[name].astype(np.float64) for name in FEATURES], axis=1))
+            self.seen += len(batch)
+            self.kept += int(np.count_nonzero(keep))
+            for record, ok in zip(batch, keep):
+                if ok:
+                    yield record
+
+    def __call__(self, records):
+        return self.filter(records)
+
+    def distribution(self, quantiles=(1, 10, 50, 90, 99)):
+        # {특징 이름: 분위수 값 배열}
+        if not self._features:
+            return {}
+        values = np.concatenate(self._features)
+        points = np.percentile(values, quantiles, axis=0)
+        return {name: points[:, i] for i, name in enumerate(FEATURES)}
+
+    def print_report(self, quantiles=(1, 10, 50, 90, 99)):
+        print(f"Quality filter kept {self.kept} of {self.seen} documents")
+        for name, count in self.rejected.items():
+            if count:
+                print(f"  rejected by {name}: {count}")
+        distribution = self.distribution(quantiles)
+        if distribution:
+            print(f"  {'feature':<18}" + ''.join(f"{f'p{q}':>10}" for q in quantiles))
+            for name, points in distribution.items():
+                print(f"  {name:<18}" + ''.join(f"{value:>10.3f}" if name != 'chars' else f"{value:>10.0f}"
+                                               for value in points))
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+
+def parse_retry_after(value):
+    # Retry-After는 초 단위 숫자 또는 HTTP 날짜 형식
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostLimiter:
+    # 호스트 하나에 대한 토큰 버킷. 응답 상태/지연에 따라 AIMD로 속도를 조절한다.
+    def __init__(self, rate=2.0, min_rate=0.2, max_rate=16.0, burst=2.0,
+                 increase=0.5, decrease=0.5, latency_factor=2.0, latency_slack=0.25):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latency_slack = latency_slack
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.latency_ewma = None
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def set_crawl_delay(self, delay):
+        # robots.txt의 Crawl-delay가 있으면 그보다 빠르게 요청하지 않는다
+        self.max_rate = min(self.max_rate, 1.0 / delay)
+        self.min_rate = min(self.min_rate, self.max_rate)
+        self.rate = min(self.rate, self.max_rate)
+
+    def record(self, status, latency, retry_after=None):
+        # 평소 지연(EWMA)보다 latency_factor배 이상 느려지면 서버가 힘들어한다고 판단.
+        # 로컬/빠른 서버의 미세한 흔들림에는 반응하지 않도록 latency_slack초의 여유를 둔다.
+        slow = self.latency_ewma is not None and latency > max(self.latency_factor * self.latency_ewma,
+                                                               self.latency_ewma + self.latency_slack)
+        if status is None or status == 429 or status >= 500 or slow:
+            # multiplicative decrease
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.0)
+        else:
+            # additive increase
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+        delay = parse_retry_after(retry_after) if status in (429, 503) else None
+        if delay:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+        if status is not None and status < 400:
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+
+class RateLimiter:
+    def __init__(self, user_agent="*", **host_options):
+        self.user_agent = user_agent
+        self.host_options = host_options
+        self.hosts = {}
+        self.robots_checked = set()
+        self.robots_lock = None
+
+    def host(self, url):
+        netloc = urlsplit(url).netloc
+        if netloc not in self.hosts:
+            self.hosts[netloc] = HostLimiter(**self.host_options)
+        return self.hosts[netloc]
+
+    async def prepare(self, session, url):
+        # 호스트별로 처음 한 번만 robots.txt를 읽어 Crawl-delay를 반영
+        parts = urlsplit(url)
+        if parts.netloc in self.robots_checked:
+            return
+        if self.robots_lock is None:
+            self.robots_lock = asyncio.Lock()
+        async with self.robots_lock:
+            if parts.netloc in self.robots_checked:
+                return
+            self.robots_checked.add(parts.netloc)
+            try:
+                async with session.get(f"{parts.scheme}://{parts.netloc}/robots.txt") as response:
+                    if response.status != 200:
+                        return
+                    text = await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return
+            parser = RobotFileParser()
+            parser.parse(text.splitlines())
+            delay = parser.crawl_delay(self.user_agent)
+            if delay:
+                self.host(url).set_crawl_delay(float(delay))
+
+    async def acquire(self, url):
+        await self.host(url).acquire()
+
+    def record(self, url, status, latency, retry_after=None):
+        self.host(url).record(status, latency, retry_after)
@@ -0,0 +1,129 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+from corpus_shards import iter_records, load_manifest, write_shards
+from crawl_frontier import CrawlFrontier
+from crawling import BASE_URL, extract_article, extract_article_links
+from discovery import feed_url_for, parse_feed
+from extractors import BACKENDS, default_backend
+from html_archive import iter_index, load_index, read_response
+from near_dedup import drop_near_duplicates
+
+
+def _links_from_archive(archive_dir, entry, backend):
+    status, text = read_response(archive_dir, entry)
+    if status != 200:
+        return []
+    try:
+        if entry['url'].split('?')[0].endswith('/feed/'):
+            return [link for link, _ in parse_feed(text) or []]
+        return [urljoin(entry['url'], href) for href in extract_article_links(text, backend)]
+    except Exception as e:
+        print(f"Failed to parse {entry['url']}: {e}")
+        return []
+
+
+def _listing_page(url, listing_prefix, feed_url):
+    # 목록 주소(.../page/N/)와 RSS 주소(.../feed/?paged=N)의 페이지 번호
+    if url.startswith(feed_url):
+        paged = parse_qs(urlsplit(url).query).get('paged', ['1'])[0]
+        return int(paged) if paged.isdigit() else 1
+    page = url[len(listing_prefix):].split('/')[0]
+    return int(page) if page.isdigit() else 1
+
+
+def _article_from_archive(archive_dir, entry, backend):
+    status, html = read_response(archive_dir, entry)
+    if status != 200:
+        return None
+    try:
+        return extract_article(html, backend)
+    except Exception as e:
+        print(f"Failed to parse {entry['url']}: {e}")
+        return None
+
+
+def _rebuild(archive_dir, task, backend):
+    # 보관된 기사 응답이 있으면 다시 추출하고, 없거나 실패하면 기존 레코드(있으면)를 그대로 쓴다
+    url, entry, record = task
+    if entry is not None:
+        result = _article_from_archive(archive_dir, entry, backend)
+        if result is not None:
+            return {'title': result[0], 'content': result[1], 'url': url}
+    return record
+
+
+def reextract(archive_dir='raw_archive', output_dir='crawled_articles', base_url=BASE_URL,
+              frontier_path='crawl_frontier.db', workers=None, backend=None, shard_size=1000):
+    # 네트워크 없이 아카이브에 보관된 기사 원본 HTML만으로 코퍼스를 다시 만든다.
+    # 대상 기사와 순서: 기존 코퍼스 -> 끝나지 않은 크롤링(frontier)에 등록된 기사 ->
+    # 보관된 목록 페이지/카테고리 RSS(보관한 모든 버전)에 나온 기사.
+    # 아카이브에 없는 기존 기사는 그대로 남기고, 다시 만든 결과가 비면 기존 코퍼스를 덮어쓰지 않는다.
+    index = load_index(archive_dir)
+    backend = backend or default_backend()
+    workers = workers or os.cpu_count() or 1
+
+    tasks = []
+    seen = set()
+
+    def add(url, record=None):
+        if url not in seen:
+            seen.add(url)
+            tasks.append((url, index.get(url), record))
+
+    if os.path.exists(output_dir):
+        for record in iter_records(output_dir):
+            add(record['url'], record)
+    if frontier_path and os.path.exists(frontier_path):
+        frontier = CrawlFrontier(frontier_path)
+        for url in frontier.urls('article'):
+            add(url)
+        frontier.close()
+
+    listing_prefix = base_url.split('{}')[0]
+    feed_url = feed_url_for(base_url)
+    # 아카이브에는 받은 순서(동시 수집이라 페이지 순서와 다름)로 쌓이므로 페이지 순서로 정렬
+    listing_entries = sorted((entry for entry in iter_index(archive_dir)
+                              if entry['url'].startswith((listing_prefix, feed_url))),
+                             key=lambda entry: _listing_page(entry['url'], listing_prefix, feed_url))
+
+    with ProcessPoolExecutor(workers) as executor:
+        for links in executor.map(partial(_links_from_archive, archive_dir, backend=backend), listing_entries):
+            for url in links:
+                add(url)
+
+        missing = sum(1 for _, entry, record in tasks if entry is None and record is None)
+        kept = sum(1 for _, entry, record in tasks if entry is None and record is not None)
+        if missing:
+            print(f"{missing} article pages are not in the archive and were skipped")
+        if kept:
+            print(f"{kept} existing articles are not in the archive and were kept as they are")
+
+        rebuilt = executor.map(partial(_rebuild, archive_dir, backend=backend), tasks,
+                               chunksize=max(1, len(tasks) // (4 * workers)))
+        records = (record for record in rebuilt if record is not None)
+        first = next(records, None)
+        if first is None and os.path.exists(output_dir):
+            print(f"Nothing could be re-extracted; keeping the existing '{output_dir}/'")
+            return load_manifest(output_dir)
+        return write_shards(drop_near_duplicates(chain([first] if first else [], records)), output_dir, shard_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the crawled corpus from the raw HTML archive")
+    parser.add_argument('--archive', default='raw_archive')
+    parser.add_argument('--output', default='crawled_articles')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default=None)
+    args = parser.parse_args()
+
+    manifest = reextract(args.archive, args.output, workers=args.workers, backend=args.backend)
+    print(f"Re-extracted {manifest['records']} articles into '{args.output}/'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import json
+
+from stage_runner import Stage, StageRunner
+
+# 크롤링 -> 정제 -> (mmap 인덱스 | 토큰화) -> 학습. 설정을 바꾼 단계와 그 뒤 단계만 다시 실행된다.
+CONFIG = {
+    'crawl': {'output_dir': 'crawled_articles'},
+    'clean': {'input_path': 'crawled_articles', 'output_dir': 'cleaned_articles',
+              'delta_dir': 'cleaned_articles.deltas'},
+    'index': {'input_path': 'cleaned_articles', 'corpus_path': 'cleaned_articles.corpus'},
+    'tokenize': {'corpus_path': 'cleaned_articles', 'output_dir': 'tokenized_dataset',
+                 'model_name': 'skt/kogpt2-base-v2', 'num_proc': None, 'delta_dir': 'cleaned_articles.deltas'},
+    'train': {'dataset_dir': 'tokenized_dataset', 'output_dir': './fine_tuned_debate_model',
+              'model_name': 'skt/kogpt2-base-v2', 'num_train_epochs': 3, 'per_device_train_batch_size': 4,
+              'pack': True, 'block_size': 512, 'max_length': 512, 'lora_rank': None,
+              'gradient_checkpointing': False},
+}
+
+
+# 크롤링은 입력 파일이 없어서 사이트가 바뀌어도 알 수 없으므로 이 시간이 지나면 다시 실행한다
+# (크롤러는 RSS/사이트맵으로 새로 올라오거나 바뀐 기사만 받으므로 자주 돌려도 부담이 작다)
+CRAWL_MAX_AGE_HOURS = 24
+
+POLICY = """When a stage runs:
+  A stage is skipped when its target, config, input fingerprints and outputs are unchanged since its last
+  successful run. Changing a stage's inputs or config re-runs it, and later stages re-run when the outputs
+  they read change.
+  Stages without inputs (crawl) cannot see the site change, so they re-run once their last run is older than
+  --max-age hours. Skips say how old the last run is.
+  Stages without outputs always run.
+  --force STAGE re-runs a stage regardless."""
+
+
+def build_stages(config=CONFIG, crawl_max_age=CRAWL_MAX_AGE_HOURS * 3600):
+    return [
+        Stage('crawl', 'crawling.crawl_debate_site',
+              outputs=[config['crawl']['output_dir']], config=config['crawl'], max_age=crawl_max_age),
+        Stage('clean', 'preprocessing.clean_corpus',
+              inputs=[config['clean']['input_path']], outputs=[config['clean']['output_dir']],
+              config=config['clean']),
+        Stage('index', 'preprocessing.build_corpus_index',
+              inputs=[config['index']['input_path']], outputs=[config['index']['corpus_path']],
+              config=config['index']),
+        Stage('tokenize', 'finetuning.tokenize_corpus',
+              inputs=[config['tokenize']['corpus_path']], outputs=[config['tokenize']['output_dir']],
+              config=config['tokenize']),
+        Stage('train', 'finetuning.train',
+              inputs=[config['train']['dataset_dir']], outputs=[config['train']['output_dir']],
+              config=config['train']),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the crawl -> clean -> tokenize -> train pipeline, "
+                                                 "skipping stages whose outputs are up to date",
+                                     epilog=POLICY, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='*', help="stages to bring up to date (default: all)")
+    parser.add_argument('--force', nargs='*', default=[], help="re-run these stages even if up to date")
+    parser.add_argument('--config', default=None, help="JSON file overriding stage settings")
+    parser.add_argument('--jobs', type=int, default=2, help="stages to run at the same time")
+    parser.add_argument('--state', default='.pipeline_state.json')
+    parser.add_argument('--max-age', type=float, default=CRAWL_MAX_AGE_HOURS,
+                        help="hours after which the crawl stage re-runs (0: every run; default: %(default)s)")
+    args = parser.parse_args()
+
+    config = {name: dict(options) for name, options in CONFIG.items()}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            for name, options in json.load(f).items():
+                config[name].update(options)
+
+    runner = StageRunner(build_stages(config, args.max_age * 3600), state_path=args.state, jobs=args.jobs)
+    ran, skipped, failed = runner.run(args.targets or None, force=set(args.force))
+    print(f"Ran {len(ran)} stages, {len(skipped)} up to date, {len(failed)} failed")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import hashlib
+import importlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from corpus_shards import MANIFEST_NAME
+
+
+def _call(target, config):
+    # 작업 프로세스에서 'module.function' 이름으로 함수를 찾아 실행 (무거운 모듈은 그 단계에서만 import)
+    module_name, func_name = target.rsplit('.', 1)
+    func = getattr(importlib.import_module(module_name), func_name)
+    start = time.monotonic()
+    func(**config)
+    return time.monotonic() - start
+
+
+class Stage:
+    # 단계 하나: target 함수를 config로 호출하면 inputs 경로를 읽고 outputs 경로를 만든다.
+    # 다른 단계의 outputs를 inputs로 가지면 그 단계 뒤에 실행된다.
+    # max_age(초)를 주면 마지막으로 끝난 지 그보다 오래됐을 때 다시 실행한다. 입력이 없는 단계(크롤링처럼
+    # 바깥에서 데이터를 가져오는 단계)는 입력 지문으로 바뀐 것을 알 수 없으므로 이것으로 주기를 정한다.
+    def __init__(self, name, target, inputs=(), outputs=(), config=None, max_age=None):
+        self.name = name
+        self.target = target
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.config = dict(config or {})
+        self.max_age = max_age
+
+
+class StageRunner:
+    # 단계들을 DAG로 묶어 실행한다. 단계마다 (target, config, 입력 지문)의 해시를 state 파일에 기록해두고,
+    # 해시가 같고 출력도 그때 그대로 남아 있으면 건너뛴다. 선행 단계가 끝난 단계들은 프로세스 풀에서 동시에 실행.
+    # 출력이 없는 단계는 최신인지 알 수 없으므로 항상 실행하고, max_age가 지난 단계는 다시 실행한다.
+    def __init__(self, stages, state_path='.pipeline_state.json', jobs=2):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.jobs = jobs
+        self.state = {'stages': {}, 'files': {}}
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        producers = {path: stage.name for stage in stages for path in stage.outputs}
+        self.deps = {stage.name: {producers[path] for path in stage.inputs if path in producers}
+                     for stage in stages}
+
+    def _save(self):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _file_digest(self, path):
+        # 파일 내용 해시. 크기/수정 시각이 같으면 지난번 값을 재사용해서 큰 파일을 매번 읽지 않는다.
+        stat = os.stat(path)
+        cached = self.state['files'].get(path)
+        if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime_ns:
+            return cached['sha256']
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        self.state['files'][path] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+                                     'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def fingerprint(self, path):
+        # 경로 내용의 지문. 없으면 None. 샤드 디렉터리는 manifest(샤드별 sha256 포함)만 본다.
+        if not os.path.exists(path):
+            return None
+        if os.path.isfile(path):
+            return self._file_digest(path)
+        if os.path.exists(os.path.join(path, MANIFEST_NAME)):
+            return self._file_digest(os.path.join(path, MANIFEST_NAME))
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+                digest.update(self._file_digest(file_path).encode('ascii'))
+        return digest.hexdigest()
+
+    def stage_key(self, stage):
+        payload = {
+            'target': stage.target,
+            'config': stage.config,
+            'inputs': {path: self.fingerprint(path) for path in stage.inputs},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def age(self, stage):
+        # 마지막으로 성공한 지 몇 초 지났는지 (기록이 없으면 None)
+        finished_at = self.state['stages'].get(stage.name, {}).get('finished_at')
+        return None if finished_at is None else time.time() - finished_at
+
+    def is_current(self, stage):
+        if not stage.outputs:
+            return False
+        record = self.state['stages'].get(stage.name)
+        if record is None or record['key'] != self.stage_key(stage):
+            return False
+        if stage.max_age is not None:
+            age = self.age(stage)
+            if age is None or age > stage.max_age:
+                return False
+        return all(self.fingerprint(path) is not None and self.fingerprint(path) == record['outputs'].get(path)
+                   for path in stage.outputs)
+
+    def _skip_note(self, stage):
+        # 입력이 없는 단계는 입력이 바뀌어도 알 수 없으므로 건너뛸 때 얼마나 오래된 결과인지 알린다
+        if stage.inputs:
+            return ''
+        age = self.age(stage)
+        note = f" (last run {age / 3600:.1f}h ago" if age is not None else " (no recorded run time"
+        if stage.max_age is None:
+            return note + "; it has no inputs and only re-runs with --force)"
+        return note + f"; re-runs after {stage.max_age / 3600:.1f}h)"
+
+    def plan(self, targets=None):
+        # targets와 그 선행 단계들 (없으면 전체)
+        needed = set()
+        pending = list(targets or self.stages)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage: {name}")
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.deps[name])
+        return needed
+
+    def run(self, targets=None, force=()):
+        # 실행한 단계 / 건너뛴 단계 / 실패한 단계 이름 리스트를 돌려준다
+        waiting = self.plan(targets)
+        finished = set()
+        ran, skipped, failed = [], [], []
+        running = {}
+        with ProcessPoolExecutor(self.jobs) as executor:
+            while waiting or running:
+                # 선행 단계가 실패하면 뒤 단계는 실행하지 않음
+                for name in sorted(waiting):
+                    if self.deps[name] & set(failed):
+                        waiting.discard(name)
+                        failed.append(name)
+                        print(f"[{name}] skipped because an upstream stage failed")
+
+                for name in sorted(waiting):
+                    if not self.deps[name] <= finished:
+                        continue
+                    waiting.discard(name)
+                    stage = self.stages[name]
+                    if name not in force and self.is_current(stage):
+                        print(f"[{name}] up to date{self._skip_note(stage)}")
+                        skipped.append(name)
+                        finished.add(name)
+                        continue
+                    print(f"[{name}] running {stage.target}")
+                    running[executor.submit(_call, stage.target, stage.config)] = (name, self.stage_key(stage))
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key = running.pop(future)
+                    try:
+                        seconds = future.result()
+                    except Exception as e:
+                        print(f"[{name}] failed: {e}")
+                        failed.append(name)
+                        continue
+                    outputs = {path: self.fingerprint(path) for path in self.stages[name].outputs}
+                    self.state['stages'][name] = {'key': key, 'outputs': outputs, 'seconds': round(seconds, 3),
+                                                  'finished_at': time.time()}
+                    self._save()
+                    print(f"[{name}] finished in {seconds:.1f}s")
+                    ran.append(name)
+                    finished.add(name)
+        self._save()
+        return ran, skipped, failed
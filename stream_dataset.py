@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+
+from corpus_shards import iter_records
+
+
+def format_record(record):
+    # 코퍼스 종류별 학습 텍스트: 이미 text가 있으면 그대로, 기사는 제목/본문, 토론 기록은 main.py 평가와 같은 대화 형식
+    if 'text' in record:
+        return record['text']
+    if 'chat_history' in record:
+        lines = [f"{'You' if 'user' in msg else 'AI'}: {msg.get('user', msg.get('ai', ''))}"
+                 for msg in record['chat_history']]
+        topic = record.get('topic') or record.get('title')
+        return (f"토론 주제: {topic}\n" if topic else '') + "\n".join(lines)
+    return f"토론 주제: {record['title']}\n내용: {record['content']}"
+
+
+def interleave(sources, weights, rng):
+    # 소스마다 가중치 비율로 다음 레코드를 뽑는다. 다 읽은 소스는 빼고 나머지 가중치로 계속 (모두 끝나면 종료)
+    iterators = [iter(source) for source in sources]
+    weights = list(weights)
+    while iterators:
+        index = rng.choices(range(len(iterators)), weights=weights)[0]
+        try:
+            yield next(iterators[index])
+        except StopIteration:
+            del iterators[index], weights[index]
+
+
+def shuffle_buffer(records, size, rng):
+    # 최대 size개만 메모리에 두고 섞는다 (버퍼에서 무작위로 하나 꺼내고 그 자리에 새 레코드)
+    buffer = []
+    for record in records:
+        if len(buffer) < size:
+            buffer.append(record)
+            continue
+        index = rng.randrange(size)
+        yield buffer[index]
+        buffer[index] = record
+    rng.shuffle(buffer)
+    yield from buffer
+
+
+class StreamingTextDataset(IterableDataset):
+    # 여러 코퍼스(샤드 디렉터리, JSONL, JSON, .corpus)를 한 건씩 읽어 가중치대로 섞고, 제한된 버퍼로 셔플한 뒤
+    # DataLoader 작업 프로세스에서 바로 토큰화해서 block_size 블록으로 패킹해 내보낸다.
+    # 코퍼스 전체나 토큰 전체를 메모리/디스크에 미리 만들지 않으므로 RAM보다 큰 코퍼스도 학습할 수 있다.
+    # 블록 형식은 TokenBlockDataset과 같다 (position_ids는 문서/블록 시작마다 0부터, 문서 첫 토큰 labels는 -100).
+    def __init__(self, sources, tokenizer, weights=None, block_size=512, buffer_size=10000, seed=0):
+        self.sources = list(sources)
+        self.tokenizer = tokenizer
+        self.weights = list(weights) if weights else [1.0] * len(self.sources)
+        self.block_size = block_size
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        # Trainer가 에폭마다 불러서 셔플 순서를 바꾼다
+        self.epoch = epoch
+
+    def _texts(self):
+        info = get_worker_info()
+        worker, workers = (info.id, info.num_workers) if info is not None else (0, 1)
+        rng = random.Random(hash((self.seed, self.epoch, worker)))
+        # 작업 프로세스마다 소스를 겹치지 않는 구간으로 나눠 자기 구간만 읽고 디코딩한다.
+        # 나눌 수 없는 파일(.jsonl.gz/.json)은 소스마다 다른 작업 프로세스가 통째로 맡도록 구간 번호를 돌린다.
+        sources = [iter_records(path, (worker + index) % workers, workers) for index, path in enumerate(self.sources)]
+        records = shuffle_buffer(interleave(sources, self.weights, rng), self.buffer_size, rng)
+        for record in records:
+            yield format_record(record)
+
+    def __iter__(self):
+        eos = self.tokenizer.eos_token_id
+        size = self.block_size
+        ids, positions, labels = [], [], []
+        for text in self._texts():
+            doc = self.tokenizer(text)["input_ids"] + [eos]
+            offset = 0
+            while offset < len(doc):
+                take = min(size - len(ids), len(doc) - offset)
+                piece = doc[offset:offset + take]
+                ids.extend(piece)
+                positions.extend(range(take))
+                labels.extend([-100] + piece[1:] if offset == 0 else piece)
+                offset += take
+                if len(ids) == size:
+                    yield {"input_ids": np.asarray(ids), "position_ids": np.asarray(positions),
+                           "labels": np.asarray(labels)}
+                    ids, positions, labels = [], [], []
+        if ids:
+            yield {"input_ids": np.asarray(ids), "position_ids": np.asarray(positions), "labels": np.asarray(labels)}
+
@@ -0,0 +1,84 @@
+import json
+import os
+
+from corpus_delta import (apply_delta, deltas_between, diff_corpus, load_delta, next_delta_path, record_generation,
+                          with_stable_id)
+from corpus_shards import corpus_fingerprint, iter_records
+
+
+def article(post, revision=0):
+    return {'title': f"제목 {post}", 'content': f"본문 {post} 수정 {revision}", 'url': f"http://example.com/post/{post}/"}
+
+
+def run_generation(corpus_dir, delta_dir, records):
+    # preprocessing.clean_corpus와 같은 순서 (품질 필터 없이)
+    base = corpus_fingerprint(corpus_dir) if os.path.exists(corpus_dir) else None
+    delta_path = next_delta_path(delta_dir)
+    counts = diff_corpus(corpus_dir, (with_stable_id(dict(record)) for record in records), delta_path)
+    apply_delta(corpus_dir, delta_path, shard_size=2)
+    record_generation(delta_dir, delta_path, base, corpus_fingerprint(corpus_dir))
+    return base, counts
+
+
+def urls(path):
+    return [record['url'] for record in iter_records(path)]
+
+
+def test_delta_applied_over_base_generation(tmp_path):
+    corpus_dir, delta_dir = str(tmp_path / 'cleaned'), str(tmp_path / 'deltas')
+    run_generation(corpus_dir, delta_dir, [article(0), article(1), article(2), article(3)])
+    base = corpus_fingerprint(corpus_dir)
+
+    _, counts = run_generation(corpus_dir, delta_dir, [article(0), article(1, 1), article(3), article(4)])
+    assert counts == {'added': 1, 'changed': 1, 'removed': 1, 'unchanged': 2}
+    # 기존 순서 유지, 바뀐 기사는 제자리, 지운 기사는 빠지고 새 기사는 끝에
+    records = list(iter_records(corpus_dir))
+    assert [record['url'] for record in records] == [article(post)['url'] for post in (0, 1, 3, 4)]
+    assert records[1]['content'] == article(1, 1)['content']
+
+    # 다운스트림이 base 세대에서 delta만 적용하면 같은 코퍼스가 된다
+    paths = deltas_between(delta_dir, base, corpus_fingerprint(corpus_dir))
+    assert len(paths) == 1
+    rebuilt_base = str(tmp_path / 'base.jsonl')
+    with open(rebuilt_base, 'w', encoding='utf-8') as f:
+        for post in range(4):
+            f.write(json.dumps(with_stable_id(article(post)), ensure_ascii=False) + '\n')
+    apply_delta(rebuilt_base, paths[0], out_path=str(tmp_path / 'replayed.jsonl'))
+    assert list(iter_records(str(tmp_path / 'replayed.jsonl'))) == records
+
+
+def test_unchanged_generation_is_not_recorded(tmp_path):
+    corpus_dir, delta_dir = str(tmp_path / 'cleaned'), str(tmp_path / 'deltas')
+    run_generation(corpus_dir, delta_dir, [article(0), article(1)])
+    fingerprint = corpus_fingerprint(corpus_dir)
+    run_generation(corpus_dir, delta_dir, [article(0), article(1)])
+    assert corpus_fingerprint(corpus_dir) == fingerprint
+    assert deltas_between(delta_dir, fingerprint, fingerprint) == []
+    assert sorted(os.listdir(delta_dir)) == ['delta-000001.jsonl', 'generations.json']
+
+
+def test_chained_deltas_compose_removal_and_readd(tmp_path):
+    corpus_dir, delta_dir = str(tmp_path / 'cleaned'), str(tmp_path / 'deltas')
+    run_generation(corpus_dir, delta_dir, [article(0), article(1), article(2)])
+    base = corpus_fingerprint(corpus_dir)
+    run_generation(corpus_dir, delta_dir, [article(0), article(2)])
+    run_generation(corpus_dir, delta_dir, [article(0), article(2, 1), article(1)])
+    result = corpus_fingerprint(corpus_dir)
+
+    paths = deltas_between(delta_dir, base, result)
+    assert len(paths) == 2
+    upserts, removed = load_delta(*paths)
+    ids = {with_stable_id(article(post))['id'] for post in range(3)}
+    id_1, id_2 = (with_stable_id(article(post))['id'] for post in (1, 2))
+    # 지웠다가 다시 추가한 기사는 제자리에서 빠지고 끝에 다시 붙는다 (양쪽에 모두 들어감)
+    assert removed == {id_1}
+    assert set(upserts) == {id_1, id_2} and set(upserts) <= ids
+    assert urls(corpus_dir) == [article(post)['url'] for post in (0, 2, 1)]
+
+    # 중간 세대가 빠지면 이어 붙일 수 없다
+    os.remove(paths[0])
+    with open(os.path.join(delta_dir, 'generations.json'), 'r', encoding='utf-8') as f:
+        generations = json.load(f)
+    with open(os.path.join(delta_dir, 'generations.json'), 'w', encoding='utf-8') as f:
+        json.dump([g for g in generations if g['file'] != os.path.basename(paths[0])], f)
+    assert deltas_between(delta_dir, base, result) is None
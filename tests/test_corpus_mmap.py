@@ -0,0 +1,70 @@
+import struct
+
+import pytest
+
+from corpus_delta import article_id
+from corpus_mmap import HEADER_SIZE, MAGIC, MappedCorpus, _HEADER, _HEADER_V1, write_corpus
+
+
+def records_with_ids(ids):
+    return [{'id': record_id, 'title': f"제목 {record_id}", 'content': f"본문 {record_id} " * 3,
+             'url': f"http://example.com/{record_id}"} for record_id in ids]
+
+
+def write(tmp_path, ids, name='test.corpus'):
+    path = str(tmp_path / name)
+    write_corpus(records_with_ids(ids), path)
+    return path
+
+
+def test_lookup_with_colliding_and_wrapping_slots(tmp_path):
+    # 5개면 테이블은 16칸: 하위 4비트가 같은 id끼리 충돌하고, 15번 칸에서 시작한 탐사는 0번 칸으로 넘어간다
+    ids = [15, 31, 47, 16, (1 << 62) | 15]
+    path = write(tmp_path, ids)
+    with MappedCorpus(path) as corpus:
+        assert len(corpus.table) == 16
+        for index, record_id in enumerate(ids):
+            assert corpus.index_of(record_id) == index
+            assert corpus.by_id(record_id)['title'] == f"제목 {record_id}"
+
+
+@pytest.mark.parametrize('missing', [0, 63, 79, 32, 1 << 62])
+def test_missing_ids_raise_key_error(tmp_path, missing):
+    path = write(tmp_path, [15, 31, 47, 16, (1 << 62) | 15])
+    with MappedCorpus(path) as corpus:
+        with pytest.raises(KeyError):
+            corpus.index_of(missing)
+
+
+def test_url_hash_ids(tmp_path):
+    ids = [article_id(f"http://example.com/post/{i}/") for i in range(3000)]
+    path = write(tmp_path, ids)
+    with MappedCorpus(path) as corpus:
+        assert [corpus.index_of(record_id) for record_id in ids] == list(range(len(ids)))
+        assert corpus.by_id(ids[1234])['url'] == f"http://example.com/{ids[1234]}"
+        with pytest.raises(KeyError):
+            corpus.index_of(article_id("http://example.com/post/not-there/"))
+
+
+def test_empty_corpus(tmp_path):
+    path = write(tmp_path, [])
+    with MappedCorpus(path) as corpus:
+        assert len(corpus) == 0
+        with pytest.raises(KeyError):
+            corpus.index_of(1)
+
+
+@pytest.mark.parametrize('ids', [[1, 2, 3, 4], [40, 7, 1 << 40, 19]])
+def test_version_1_files_still_resolve_ids(tmp_path, ids):
+    # 버전 1은 해시 테이블이 없는 같은 배치. 헤더만 버전 1로 바꾸면 테이블 뒤쪽 바이트는 무시된다
+    path = write(tmp_path, ids)
+    with open(path, 'r+b') as f:
+        header = _HEADER.unpack(f.read(_HEADER.size))
+        assert header[0] == MAGIC
+        f.seek(0)
+        f.write(_HEADER_V1.pack(MAGIC, 1, *header[2:8]).ljust(HEADER_SIZE, b'\0'))
+    with MappedCorpus(path) as corpus:
+        assert corpus.table is None
+        assert [corpus.index_of(record_id) for record_id in ids] == list(range(len(ids)))
+        with pytest.raises(KeyError):
+            corpus.index_of(5)
@@ -0,0 +1,47 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from corpus_shards import MANIFEST_NAME, iter_records, load_manifest, read_record, verify_shards, write_shards
+
+
+def article(index):
+    return {'title': f"제목 {index}", 'content': '본문 ' * (index % 4 + 1), 'url': f"http://example.com/{index}/"}
+
+
+def test_manifest_keeps_only_per_shard_fields(tmp_path):
+    out_dir = str(tmp_path / 'shards')
+    manifest = write_shards((article(i) for i in range(25)), out_dir, shard_size=10)
+    assert manifest['records'] == 25
+    assert [shard['records'] for shard in manifest['shards']] == [10, 10, 5]
+    for shard in manifest['shards']:
+        # 레코드 오프셋은 manifest가 아니라 샤드별 인덱스 파일에
+        assert set(shard) == {'file', 'index_file', 'records', 'bytes', 'sha256'}
+        offsets = np.load(os.path.join(out_dir, shard['index_file']))
+        assert offsets.dtype == np.int64
+        assert len(offsets) == shard['records'] + 1
+        assert offsets[0] == 0 and offsets[-1] == shard['bytes']
+    assert verify_shards(out_dir) == []
+    assert [read_record(out_dir, i) for i in range(25)] == [article(i) for i in range(25)]
+    with pytest.raises(IndexError):
+        read_record(out_dir, 25)
+
+
+def test_legacy_manifest_with_inline_offsets(tmp_path):
+    out_dir = str(tmp_path / 'shards')
+    write_shards((article(i) for i in range(7)), out_dir, shard_size=3)
+    # 예전 형식: manifest의 샤드마다 offsets 리스트, 인덱스 파일 없음
+    manifest = load_manifest(out_dir)
+    for shard in manifest['shards']:
+        index_path = os.path.join(out_dir, shard.pop('index_file'))
+        shard['offsets'] = np.load(index_path)[:-1].tolist()
+        os.remove(index_path)
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    assert [read_record(out_dir, i) for i in range(7)] == [article(i) for i in range(7)]
+    for parts in (1, 2, 3):
+        assert [record for part in range(parts) for record in iter_records(out_dir, part, parts)] == \
+            [article(i) for i in range(7)]
@@ -0,0 +1,54 @@
+import json
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from corpus_pipeline import write_records
+from corpus_shards import iter_records
+
+FORMATS = ['cleaned', 'corpus.corpus', 'corpus.jsonl', 'corpus.jsonl.gz', 'corpus.json']
+
+
+def article(index):
+    # 길이가 제각각인 멀티바이트 본문으로 바이트 구간 경계가 줄/문자 중간에 떨어지게 한다
+    return {'title': f"제목 {index}", 'content': '토론 ' * (index % 5 + 1) + 'é' * index,
+            'url': f"http://example.com/post/{index}/"}
+
+
+def write(tmp_path, name, count):
+    path = str(tmp_path / name)
+    records = [article(index) for index in range(count)]
+    if name.endswith('.json'):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False)
+    else:
+        write_records(records, path, shard_size=3)
+    return path
+
+
+@pytest.mark.parametrize('count', [0, 1, 2, 7, 20])
+@pytest.mark.parametrize('name', FORMATS)
+@pytest.mark.parametrize('parts', [1, 2, 3])
+def test_parts_cover_every_record_once(tmp_path, name, count, parts):
+    path = write(tmp_path, name, count)
+    whole = list(iter_records(path))
+    assert len(whole) == count
+    # 구간을 순서대로 이어 붙이면 나누지 않고 읽은 것과 같다 (빠지거나 두 번 나오는 레코드 없음)
+    assert [record for part in range(parts) for record in iter_records(path, part, parts)] == whole
+
+
+def test_streaming_workers_read_disjoint_parts(tmp_path, monkeypatch):
+    pytest.importorskip("torch")
+    import stream_dataset
+    from stream_dataset import StreamingTextDataset, format_record
+
+    sources = [write(tmp_path, name, count) for name, count in zip(FORMATS, (11, 7, 9, 5, 4))]
+    expected = Counter(format_record(record) for path in sources for record in iter_records(path))
+    for workers in (1, 2, 3):
+        texts = Counter()
+        for worker in range(workers):
+            info = SimpleNamespace(id=worker, num_workers=workers)
+            monkeypatch.setattr(stream_dataset, 'get_worker_info', lambda info=info: info)
+            texts.update(StreamingTextDataset(sources, tokenizer=None, buffer_size=4)._texts())
+        assert texts == expected
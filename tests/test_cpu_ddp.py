@@ -0,0 +1,31 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+
+import cpu_ddp
+
+
+@pytest.mark.parametrize('cores', [1, 4, 8, 12, 16, 24, 64])
+def test_default_procs_divides_accumulation(cores):
+    procs = cpu_ddp.default_procs(16, 4, cores)
+    assert 1 <= procs <= max(1, cores // 4)
+    assert (16 // 4) % procs == 0
+
+
+def test_launch_restores_omp_threads(monkeypatch):
+    def fake_spawn(worker, args, nprocs, join):
+        assert os.environ['OMP_NUM_THREADS'] == '1'
+        with open(args[-1], 'w', encoding='utf-8') as f:
+            json.dump({'train_samples_per_second': 1.0}, f)
+
+    monkeypatch.setattr(cpu_ddp.mp, 'spawn', fake_spawn)
+    monkeypatch.setenv('OMP_NUM_THREADS', '7')
+    assert cpu_ddp.launch(2, threads=1) == {'train_samples_per_second': 1.0}
+    assert os.environ['OMP_NUM_THREADS'] == '7'
+
+    monkeypatch.delenv('OMP_NUM_THREADS')
+    cpu_ddp.launch(2, threads=1)
+    assert 'OMP_NUM_THREADS' not in os.environ
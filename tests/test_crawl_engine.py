@@ -0,0 +1,62 @@
+import asyncio
+import os
+
+from aiohttp import web
+
+from crawl_engine import AsyncCrawler
+from crawl_frontier import CrawlFrontier, FAILED
+from crawl_metrics import CrawlMetrics
+from crawling import extract_article, extract_article_links
+from fixture_site import FixtureSite
+
+
+class FailingCache:
+    # 지정한 URL의 응답을 저장할 때 디스크 오류가 나는 캐시
+    def __init__(self, failing):
+        self.failing = failing
+
+    def conditional_headers(self, url):
+        return None
+
+    def load_body(self, url):
+        return None
+
+    def store(self, url, body, headers):
+        if url in self.failing:
+            raise OSError(28, "No space left on device")
+
+
+def test_per_url_errors_do_not_abort_the_crawl(tmp_path):
+    site = FixtureSite(pages=3, per_page=3, paragraphs=2)
+    handle = site.handle
+
+    async def faulty(request):
+        path = request.rel_url.raw_path
+        if path in ('/post/1/', '/post/4/'):
+            response = web.StreamResponse(headers={'Content-Length': '1000', 'Content-Type': 'text/html'})
+            await response.prepare(request)
+            await response.write(b'<html>')
+            if path == '/post/4/':
+                # 본문을 보내다가 멈춤 -> 클라이언트 시간 초과
+                await asyncio.sleep(3)
+            # 선언한 길이보다 짧게 끝냄 -> ClientPayloadError
+            return response
+        return await handle(request)
+
+    site.handle = faulty
+    with site:
+        listing_urls = [(page, site.listing_url.format(page)) for page in range(1, 4)]
+        frontier = CrawlFrontier(str(tmp_path / 'frontier.db'))
+        metrics = CrawlMetrics(path=None)
+        crawler = AsyncCrawler(extract_article_links, extract_article, concurrency=4, timeout=1, retries=0,
+                               cache=FailingCache({listing_urls[2][1]}), frontier=frontier, metrics=metrics)
+        records = list(asyncio.run(crawler.crawl(listing_urls)))
+
+        assert [record['url'] for record in records] == [f"{site.base_url}/post/{post}/" for post in (0, 2, 3, 5)]
+        failed = frontier.conn.execute("SELECT url FROM urls WHERE state = ? ORDER BY url", (FAILED,)).fetchall()
+        assert sorted(url for (url,) in failed) == sorted([f"{site.base_url}/post/1/", f"{site.base_url}/post/4/",
+                                                          listing_urls[2][1]])
+        errors = {event['url']: event['error'] for event in metrics.fetches if event.get('error')}
+        assert set(errors) == {url for (url,) in failed}
+        assert 'OSError' in errors[listing_urls[2][1]]
+        frontier.close()
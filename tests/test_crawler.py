@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from corpus_shards import iter_records
+from crawling import crawl_debate_site
+from fixture_site import FixtureSite
+from reextract import reextract
+
+PAGES = 2
+PER_PAGE = 5
+
+
+@pytest.fixture
+def site():
+    with FixtureSite(pages=PAGES, per_page=PER_PAGE, paragraphs=4) as site:
+        yield site
+
+
+def crawl(site, tmp_path, output_dir='crawled_articles'):
+    return crawl_debate_site(base_url=site.listing_url, pages=range(1, PAGES + 1), parse_workers=1,
+                             cache_dir=str(tmp_path / '.http_cache'),
+                             frontier_path=str(tmp_path / 'crawl_frontier.db'),
+                             output_dir=str(tmp_path / output_dir),
+                             archive_dir=str(tmp_path / 'raw_archive'),
+                             metrics_path=str(tmp_path / 'crawl_metrics.jsonl'),
+                             discovery_state=str(tmp_path / 'discovery_state.json'))
+
+
+def article_urls(site):
+    return [f"{site.base_url}/post/{post}/" for post in range(PAGES * PER_PAGE)]
+
+
+def test_records_have_site_order_and_shape(site, tmp_path):
+    manifest = crawl(site, tmp_path)
+    records = list(iter_records(str(tmp_path / 'crawled_articles')))
+
+    assert manifest['records'] == PAGES * PER_PAGE
+    assert [record['url'] for record in records] == article_urls(site)
+    for post, record in enumerate(records):
+        assert set(record) == {'title', 'content', 'url'}
+        assert record['title'].endswith(str(post))
+        assert record['content']
+        # 본문 안의 script는 추출에서 빠져야 함
+        assert 'console' not in record['content']
+    assert not os.path.exists(tmp_path / 'crawl_frontier.db')
+
+
+def test_resume_from_frontier(site, tmp_path, monkeypatch):
+    failing = {'/post/3/', '/post/7/'}
+    render = site._render
+    requested = []
+
+    def flaky_render(path):
+        requested.append(path)
+        return None if path in failing else render(path)
+
+    monkeypatch.setattr(site, '_render', flaky_render)
+    manifest = crawl(site, tmp_path)
+    assert manifest['records'] == PAGES * PER_PAGE - len(failing)
+    # 실패한 기사가 남아 있으면 진행 상황 파일을 지우지 않음
+    assert os.path.exists(tmp_path / 'crawl_frontier.db')
+
+    failing.clear()
+    requested.clear()
+    crawl(site, tmp_path)
+    records = list(iter_records(str(tmp_path / 'crawled_articles')))
+
+    # 다시 실행하면 실패했던 기사만 받아서 사이트 순서대로 합친다
+    assert sorted(requested) == ['/post/3/', '/post/7/']
+    assert [record['url'] for record in records] == article_urls(site)
+    assert not os.path.exists(tmp_path / 'crawl_frontier.db')
+
+
+def test_reextract_from_archive_matches_crawl(site, tmp_path):
+    crawl(site, tmp_path)
+    crawled = list(iter_records(str(tmp_path / 'crawled_articles')))
+
+    # 기존 코퍼스도 진행 상황 파일도 없이 보관한 목록/기사 페이지만으로 다시 만든다
+    reextract(archive_dir=str(tmp_path / 'raw_archive'), output_dir=str(tmp_path / 'reextracted'),
+              base_url=site.listing_url, frontier_path=None, workers=1)
+    assert list(iter_records(str(tmp_path / 'reextracted'))) == crawled
+
+    # 기존 코퍼스가 있으면 그 순서를 유지한 채 같은 기록을 다시 만든다
+    reextract(archive_dir=str(tmp_path / 'raw_archive'), output_dir=str(tmp_path / 'crawled_articles'),
+              base_url=site.listing_url, frontier_path=None, workers=1)
+    assert list(iter_records(str(tmp_path / 'crawled_articles'))) == crawled
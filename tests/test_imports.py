@@ -0,0 +1,24 @@
+import importlib
+import sys
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+# 학습 쪽 스크립트는 실행하지 않고 import만 해서 의존성 경로(transformers API 위치 등)가 맞는지 확인
+TRAINING_MODULES = ['finetuning', 'finetuned_model', 'bench_padding', 'cpu_ddp', 'memory_planner', 'stream_dataset',
+                    'token_shards', 'training_telemetry', 'run_pipeline']
+
+
+@pytest.mark.parametrize('name', TRAINING_MODULES)
+def test_import(name):
+    importlib.import_module(name)
+
+
+def test_missing_peft_error(monkeypatch):
+    # peft 없이 LoRA 경로를 쓰면 설치 방법이 담긴 ImportError
+    import finetuned_model
+    monkeypatch.setitem(sys.modules, 'peft', None)
+    with pytest.raises(ImportError, match="pip install peft"):
+        finetuned_model.import_peft()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from finetuning import PackedCollator
+from token_shards import TokenBlockDataset, TokenShards, TokenShardWriter
+from training_telemetry import TrainingTelemetry
+
+
+def tiny_model(attn_implementation):
+    torch.manual_seed(0)
+    config = transformers.GPT2Config(vocab_size=100, n_positions=64, n_embd=32, n_layer=2, n_head=2)
+    config._attn_implementation = attn_implementation
+    return transformers.GPT2LMHeadModel(config).eval().requires_grad_(False)
+
+
+def packed_blocks(tmp_path, docs, block_size):
+    writer = TokenShardWriter(str(tmp_path / 'tok'))
+    for doc in docs:
+        writer.write(doc)
+    writer.close()
+    dataset = TokenBlockDataset(TokenShards(str(tmp_path / 'tok')), block_size)
+    return [dataset[i] for i in range(len(dataset))]
+
+
+@pytest.mark.parametrize('attn_implementation', ['eager', 'sdpa'])
+def test_packed_documents_do_not_attend_to_each_other(tmp_path, attn_implementation):
+    model = tiny_model(attn_implementation)
+    rng = np.random.default_rng(0)
+    docs = [rng.integers(1, 100, length) for length in (7, 9, 5)]
+    # 블록 하나에 문서 세 개, 두 번째 블록은 짧아서 패딩이 생긴다
+    blocks = packed_blocks(tmp_path, docs + [rng.integers(1, 100, 4)], 21)
+    batch = PackedCollator(0)(blocks)
+    logits = model(**batch).logits
+
+    start = 0
+    for doc in docs:
+        alone = model(input_ids=torch.tensor(doc)[None]).logits[0]
+        torch.testing.assert_close(logits[0, start:start + len(doc)], alone, atol=1e-5, rtol=1e-5)
+        start += len(doc)
+    assert torch.isfinite(model(**batch).loss)
+
+
+def test_telemetry_counts_real_tokens_with_document_mask(tmp_path):
+    blocks = packed_blocks(tmp_path, [np.arange(1, 8), np.arange(1, 10), np.arange(1, 5)], 12)
+    batch = PackedCollator(0)(blocks)
+    telemetry = TrainingTelemetry(path=None)
+    telemetry.count_batch(batch)
+    assert telemetry.current['tokens'] == 7 + 9 + 4
+    assert telemetry.current['padded_tokens'] == batch['input_ids'].numel()
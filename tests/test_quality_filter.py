@@ -0,0 +1,122 @@
+import random
+import re
+
+import numpy as np
+import pytest
+
+from quality_filter import FEATURES, QualityFilter
+
+SPACES = '\t\x0b\x0c\r \xa0　'
+BREAKS = '\n.?!'
+
+
+def naive_features(text, n=3):
+    # 문서 하나씩 파이썬으로 그대로 센 기준값
+    def kind(ch):
+        if ch in SPACES:
+            return 'space'
+        if ch in BREAKS:
+            return 'break'
+        code = ord(ch)
+        if 0xAC00 <= code < 0xD7A4 or 0x1100 <= code < 0x1200 or 0x3130 <= code < 0x3190:
+            return 'hangul'
+        if '0' <= ch <= '9':
+            return 'digit'
+        if 'A' <= ch <= 'Z' or 'a' <= ch <= 'z':
+            return 'latin'
+        return 'other'
+
+    kinds = [kind(ch) for ch in text]
+    chars = sum(k not in ('space', 'break') for k in kinds)
+    denominator = max(chars, 1)
+    blank = '[' + re.escape(SPACES + BREAKS) + ']+'
+
+    words = [word for word in re.split(blank, text) if word]
+    grams = [tuple(words[i:i + n]) for i in range(len(words) - n + 1)]
+    ngram_repetition = (len(grams) - len(set(grams))) / len(grams) if len(grams) >= 2 else 0.0
+
+    seen, repeated, total = set(), 0, 0
+    for segment in re.split('[' + re.escape(BREAKS) + ']', text):
+        segment_words = [word for word in re.split(blank, segment) if word]
+        if not segment_words:
+            continue
+        # 앞뒤 공백을 뺀 문장 전체 (안쪽 공백 포함)가 같으면 반복
+        key = segment.strip(SPACES)
+        weight = sum(map(len, segment_words))
+        total += weight
+        if key in seen:
+            repeated += weight
+        seen.add(key)
+
+    return {
+        'chars': chars,
+        'hangul': kinds.count('hangul') / denominator,
+        'digit': kinds.count('digit') / denominator,
+        'latin': kinds.count('latin') / denominator,
+        'repeated_lines': repeated / total if total else 0.0,
+        'ngram_repetition': ngram_repetition,
+    }
+
+
+def random_text(rng):
+    words = ['토론', '주제', '찬성', '반대', 'debate', 'AI', '2024', '12.5', 'ㄱㄴ', '😀', '논제']
+    sentences = [' '.join(rng.choice(words) for _ in range(rng.randint(1, 6))) for _ in range(rng.randint(1, 4))]
+    parts = []
+    for _ in range(rng.randint(0, 12)):
+        parts.append(rng.choice(sentences) if rng.random() < 0.5 else rng.choice(words))
+        parts.append(rng.choice(['. ', '\n', '? ', '! ', ' ', '\t', '\xa0', '　', '  ', '.\n']))
+    return rng.choice(['', ' ', '\n']) + ''.join(parts)
+
+
+@pytest.mark.parametrize('ngram', [1, 2, 3])
+def test_batch_features_match_naive(ngram):
+    rng = random.Random(ngram)
+    texts = [random_text(rng) for _ in range(300)] + ['', ' \n ', '가 나 다 가 나 다', 'a. a. a.', '😀😀 😀😀']
+    quality = QualityFilter(ngram=ngram)
+    # 배치 크기가 바뀌어도 (거듭제곱 표 재사용/확장) 같은 값
+    for batch in (texts[:7], texts, texts[7:20]):
+        features = quality.features(batch)
+        expected = [naive_features(text, ngram) for text in batch]
+        for name in FEATURES:
+            np.testing.assert_allclose(features[name], [values[name] for values in expected], err_msg=name)
+
+
+def test_repetition_examples():
+    features = QualityFilter(ngram=2).features([
+        '가 나 다 라',
+        '토론 주제. 토론 주제. 새 문장',
+        '가 나 가 나 가 나',
+    ])
+    # 문장 무게는 단어 글자 수: (토론 주제 4) x 2 + (새 문장 3) 중 두 번째 4글자가 반복
+    assert features['repeated_lines'].tolist() == [0.0, 4 / 11, 0.0]
+    # 2-gram 5개 중 (가 나) 2번, (나 가) 1번이 중복
+    assert features['ngram_repetition'][2] == pytest.approx(3 / 5)
+    assert features['ngram_repetition'][0] == 0.0
+
+
+def test_thresholds_are_strict_and_optional():
+    quality = QualityFilter(min_chars=4, max_chars=6, min_hangul=0.5, max_digit=0.25, max_latin=None,
+                            max_repeated_lines=None, max_ngram_repetition=None)
+    features = {
+        'chars': np.array([4, 3, 6, 7, 5, 5, 5]),
+        'hangul': np.array([0.5, 1.0, 1.0, 1.0, 0.4, 1.0, 0.1]),
+        'digit': np.array([0.25, 0.0, 0.0, 0.0, 0.0, 0.3, 0.0]),
+        'latin': np.array([1.0] * 7),
+        'repeated_lines': np.ones(7),
+        'ngram_repetition': np.ones(7),
+    }
+    assert quality.keep_mask(features).tolist() == [True, False, True, False, False, False, False]
+    assert quality.rejected == {'min_chars': 1, 'max_chars': 1, 'min_hangul': 2, 'max_digit': 1, 'max_latin': 0,
+                                'max_repeated_lines': 0, 'max_ngram_repetition': 0}
+
+
+def test_filter_keeps_order_across_batches():
+    good = '토론 주제에 대한 찬성 측 근거를 정리한다. 반대 측은 다른 근거를 든다.'
+    records = [{'content': good + str(i)} if i % 3 else {'content': 'short'} for i in range(10)]
+    records.append({'title': 'no content'})
+    quality = QualityFilter(min_chars=10, batch_size=3)
+    kept = list(quality(records))
+    assert kept == [record for i, record in enumerate(records[:10]) if i % 3]
+    assert (quality.seen, quality.kept) == (11, 6)
+    assert quality.rejected['min_chars'] == 5
+    assert set(quality.distribution()) == set(FEATURES)
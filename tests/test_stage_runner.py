@@ -0,0 +1,85 @@
+import os
+
+from stage_runner import Stage, StageRunner
+
+
+def produce(path, log, text='data'):
+    # 작업 프로세스에서 실행되는 단계 함수 (실행 횟수를 log에 남긴다)
+    with open(log, 'a', encoding='utf-8') as f:
+        f.write('produce\n')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def consume(source, path, log):
+    with open(log, 'a', encoding='utf-8') as f:
+        f.write('consume\n')
+    with open(source, 'r', encoding='utf-8') as f, open(path, 'w', encoding='utf-8') as out:
+        out.write(f.read().upper())
+
+
+def notify(log):
+    with open(log, 'a', encoding='utf-8') as f:
+        f.write('notify\n')
+
+
+def runs(log):
+    with open(log, 'r', encoding='utf-8') as f:
+        return f.read().split()
+
+
+def stages(tmp_path, max_age=None, text='data'):
+    raw, out, log = str(tmp_path / 'raw.txt'), str(tmp_path / 'out.txt'), str(tmp_path / 'log')
+    return [
+        Stage('source', 'test_stage_runner.produce', outputs=[raw], config={'path': raw, 'log': log, 'text': text},
+              max_age=max_age),
+        Stage('derive', 'test_stage_runner.consume', inputs=[raw], outputs=[out],
+              config={'source': raw, 'path': out, 'log': log}),
+        Stage('notify', 'test_stage_runner.notify', inputs=[out], config={'log': log}),
+    ]
+
+
+def run(tmp_path, **options):
+    force = options.pop('force', ())
+    runner = StageRunner(stages(tmp_path, **options), state_path=str(tmp_path / 'state.json'), jobs=1)
+    return runner.run(force=force), runner
+
+
+def test_unchanged_stages_are_skipped_but_stages_without_outputs_always_run(tmp_path, capsys):
+    (ran, skipped, failed), _ = run(tmp_path)
+    assert (ran, skipped, failed) == (['source', 'derive', 'notify'], [], [])
+    (ran, skipped, failed), _ = run(tmp_path)
+    assert (ran, skipped) == (['notify'], ['source', 'derive'])
+    # 입력이 없고 주기도 없는 단계는 건너뛰면서 --force로만 다시 실행된다고 알린다
+    assert "only re-runs with --force" in capsys.readouterr().out
+    assert runs(str(tmp_path / 'log')) == ['produce', 'consume', 'notify', 'notify']
+
+
+def test_config_change_reruns_downstream_only_when_output_changes(tmp_path):
+    run(tmp_path)
+    (ran, skipped, _), _ = run(tmp_path, text='other')
+    assert ran == ['source', 'derive', 'notify']
+    (ran, skipped, _), _ = run(tmp_path, text='other', force={'source'})
+    # 다시 만든 출력이 같으면 뒤 단계는 건너뛴다
+    assert ran == ['source', 'notify'] and skipped == ['derive']
+
+
+def test_source_stage_reruns_after_max_age(tmp_path, capsys):
+    run(tmp_path, max_age=3600)
+    (ran, skipped, _), runner = run(tmp_path, max_age=3600)
+    assert skipped == ['source', 'derive']
+    assert "re-runs after 1.0h" in capsys.readouterr().out
+
+    # 마지막 실행을 두 시간 전으로 돌리면 다시 가져온다
+    runner.state['stages']['source']['finished_at'] -= 2 * 3600
+    runner._save()
+    (ran, skipped, _), _ = run(tmp_path, max_age=3600)
+    assert ran == ['source', 'notify'] and skipped == ['derive']
+    assert runs(str(tmp_path / 'log')).count('produce') == 2
+
+
+def test_missing_output_reruns_stage(tmp_path):
+    run(tmp_path)
+    os.remove(tmp_path / 'out.txt')
+    (ran, skipped, _), _ = run(tmp_path)
+    assert ran == ['derive', 'notify'] and skipped == ['source']
@@ -0,0 +1,51 @@
+import re
+import unicodedata
+
+import pytest
+
+from text_normalizer import TextNormalizer, normalize_batch, normalize_text
+
+TEXTS = [
+    '<p>토론 <b>주제</b>: 찬성/반대?</p>',
+    '  여러   줄\n\n공백\t정리! ',
+    'NUL\x00이 들어간\x00문서',
+    unicodedata.normalize('NFD', '한글 자모 분해'),
+    '기호 (괄호) "따옴표" — 대시... 끝',
+    '',
+    'a < b 그리고 <br/>태그',
+]
+
+
+@pytest.mark.parametrize('punctuation', ['strip', 'sentence', 'space', 'keep'])
+def test_batch_matches_per_text(punctuation):
+    normalizer = TextNormalizer(punctuation=punctuation)
+    assert normalizer.normalize_batch(TEXTS) == [normalizer(text) for text in TEXTS]
+    assert normalizer.normalize_batch(iter(TEXTS)) == [normalizer(text) for text in TEXTS]
+    assert normalizer.normalize_batch([]) == []
+
+
+def test_policies():
+    text = '<p>토론 주제: 찬성/반대? 네!</p>'
+    assert TextNormalizer(punctuation='strip')(text) == '토론 주제 찬성반대 네'
+    assert TextNormalizer(punctuation='sentence')(text) == '토론 주제 찬성반대? 네!'
+    assert TextNormalizer(punctuation='space')(text) == '토론 주제 찬성 반대? 네!'
+    assert TextNormalizer(punctuation='keep')(text) == '토론 주제: 찬성/반대? 네!'
+    with pytest.raises(ValueError):
+        TextNormalizer(punctuation='other')
+
+
+def test_nul_is_stripped_like_other_symbols():
+    assert normalize_text('a\x00b') == 'ab'
+    assert normalize_batch(['a\x00b', 'c']) == ['ab', 'c']
+
+
+def test_nfc_and_strip_policy_match_legacy_preprocess():
+    def legacy(text):
+        text = re.sub(r'<.*?>', '', text)
+        text = re.sub(r'[^\w\s]', '', text)
+        return re.sub(r'\s+', ' ', text).strip()
+
+    strip = TextNormalizer(punctuation='strip')
+    for text in TEXTS[:6]:
+        assert strip(text) == legacy(unicodedata.normalize('NFC', text))
+    assert normalize_text(TEXTS[3]) == '한글 자모 분해'
@@ -0,0 +1,99 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+from corpus_delta import apply_delta, diff_corpus, next_delta_path, record_generation, with_stable_id
+from corpus_shards import corpus_fingerprint
+from finetuning import tokenize_corpus
+from token_shards import TokenShards
+
+WORDS = '토론 주제 찬성 반대 근거 반박 논제 쟁점 정책 가치 사실 교육 사회 자유 평등'.split()
+
+
+def save_tokenizer(path, first_id):
+    # 단어 단위 토크나이저. first_id를 65536 이상으로 주면 실제 단어의 토큰 번호가 모두 uint16 범위를 넘는다
+    vocab = {'<unk>': 0, '<eos>': 1}
+    vocab.update({f"<filler{i}>": i for i in range(2, first_id)})
+    vocab.update({word: first_id + i for i, word in enumerate(WORDS + [str(n) for n in range(20)] + ['.', ':', '내용'])})
+    model = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token='<unk>'))
+    model.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer = transformers.PreTrainedTokenizerFast(tokenizer_object=model, unk_token='<unk>', eos_token='<eos>')
+    tokenizer.save_pretrained(path)
+    return str(path)
+
+
+def article(post, revision=0):
+    rng = np.random.default_rng(post * 10 + revision)
+    words = ' '.join(rng.choice(WORDS, 5 + post % 7))
+    return {'title': f"{WORDS[post % len(WORDS)]} {post}", 'content': f"{words} . {revision}",
+            'url': f"http://example.com/post/{post}/"}
+
+
+def run_generation(corpus_dir, delta_dir, records):
+    # preprocessing.clean_corpus와 같은 순서 (품질 필터 없이)
+    base = corpus_fingerprint(corpus_dir) if os.path.exists(corpus_dir) else None
+    delta_path = next_delta_path(delta_dir)
+    diff_corpus(corpus_dir, (with_stable_id(dict(record)) for record in records), delta_path)
+    apply_delta(corpus_dir, delta_path, shard_size=4)
+    record_generation(delta_dir, delta_path, base, corpus_fingerprint(corpus_dir))
+
+
+def assert_same_shards(incremental_dir, full_dir):
+    incremental, full = TokenShards(incremental_dir), TokenShards(full_dir)
+    for key in ('format', 'key', 'tokenizer', 'corpus', 'dtype', 'docs', 'tokens'):
+        assert incremental.manifest[key] == full.manifest[key]
+    assert incremental.doc_ids().tolist() == full.doc_ids().tolist()
+    for index in range(len(full)):
+        assert incremental.doc(index).dtype == full.doc(index).dtype
+        assert np.array_equal(incremental.doc(index), full.doc(index))
+
+
+@pytest.mark.parametrize('first_id, dtype', [(2, 'uint16'), (70000, 'int32')])
+def test_incremental_update_matches_full_rebuild(tmp_path, capsys, first_id, dtype):
+    model = save_tokenizer(tmp_path / 'tokenizer', first_id)
+    corpus_dir, delta_dir = str(tmp_path / 'cleaned'), str(tmp_path / 'deltas')
+    tokenized = str(tmp_path / 'tokenized')
+
+    run_generation(corpus_dir, delta_dir, [article(post) for post in range(10)])
+    tokenize_corpus(corpus_dir, tokenized, model, num_proc=1, delta_dir=delta_dir)
+    # 두 세대를 한 번에 따라잡는다: 변경, 삭제, 추가, 지웠다가 다시 추가
+    run_generation(corpus_dir, delta_dir, [article(post, 1 if post == 3 else 0) for post in range(10) if post != 5]
+                   + [article(10)])
+    run_generation(corpus_dir, delta_dir, [article(post) for post in (0, 1, 2, 4, 6, 7, 8, 9, 10, 5, 11)])
+    capsys.readouterr()
+    tokenize_corpus(corpus_dir, tokenized, model, num_proc=1, delta_dir=delta_dir)
+    assert 'Updated token shards from 2 corpus deltas' in capsys.readouterr().out
+
+    full = str(tmp_path / 'full')
+    tokenize_corpus(corpus_dir, full, model, num_proc=1, delta_dir=None)
+    assert TokenShards(full).manifest['dtype'] == dtype
+    assert_same_shards(tokenized, full)
+    if dtype == 'int32':
+        # EOS를 뺀 모든 토큰이 uint16으로는 잘리는 번호
+        assert TokenShards(full).doc(0)[:-1].min() >= 65536
+
+
+def test_tokenizer_with_larger_vocab_rebuilds_as_int32(tmp_path, capsys):
+    small = save_tokenizer(tmp_path / 'small', 2)
+    large = save_tokenizer(tmp_path / 'large', 70000)
+    corpus_dir, delta_dir = str(tmp_path / 'cleaned'), str(tmp_path / 'deltas')
+    tokenized = str(tmp_path / 'tokenized')
+    run_generation(corpus_dir, delta_dir, [article(post) for post in range(6)])
+    tokenize_corpus(corpus_dir, tokenized, small, num_proc=1, delta_dir=delta_dir)
+    assert TokenShards(tokenized).manifest['dtype'] == 'uint16'
+
+    # 토크나이저가 바뀌면 delta가 있어도 기존 uint16 토큰을 옮기지 않고 처음부터 다시 만든다
+    run_generation(corpus_dir, delta_dir, [article(post) for post in range(7)])
+    capsys.readouterr()
+    tokenize_corpus(corpus_dir, tokenized, large, num_proc=1, delta_dir=delta_dir)
+    assert 'Tokenized 7 articles' in capsys.readouterr().out
+
+    full = str(tmp_path / 'full')
+    tokenize_corpus(corpus_dir, full, large, num_proc=1, delta_dir=None)
+    assert TokenShards(tokenized).manifest['dtype'] == 'int32'
+    assert_same_shards(tokenized, full)
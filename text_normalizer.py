@@ -0,0 +1,67 @@
+import re
+import unicodedata
+
+# 문장 경계를 남길 때 유지하는 문장부호
+SENTENCE_PUNCTUATION = '.?!'
+
+
+class TextNormalizer:
+    # 유니코드 정규화(한글 NFC) 후 태그 제거와 문장부호 정책을 하나의 컴파일된 정규식 패스로 처리하고 공백을 정리
+    #   punctuation='strip'   : 기존 preprocess_text처럼 단어/공백 외 문자를 모두 삭제
+    #   punctuation='sentence': 문장부호(.?!)만 남기고 나머지는 삭제 (문장 경계 보존)
+    #   punctuation='space'   : 문장부호 외 기호를 공백으로 치환
+    #   punctuation='keep'    : 기호를 그대로 둠
+    def __init__(self, strip_tags=True, unicode_form='NFC', punctuation='sentence',
+                 keep=SENTENCE_PUNCTUATION, collapse_whitespace=True):
+        if punctuation not in ('strip', 'sentence', 'space', 'keep'):
+            raise ValueError(f"Unknown punctuation policy: {punctuation}")
+        self.unicode_form = unicode_form
+        self.collapse_whitespace = collapse_whitespace
+
+        tag = r'<[^>]*>'
+        keep = '' if punctuation == 'strip' else keep
+        # '<'는 태그의 시작일 수 있으므로 기호 묶음에 넣지 않고 따로 매칭
+        symbols = rf'[^\w\s<{re.escape(keep)}]+' + ('' if '<' in keep else '|<')
+        self.tag_pattern = None
+        if punctuation == 'keep':
+            self.pattern = re.compile(tag) if strip_tags else None
+            self.replacement = ''
+        elif punctuation == 'space':
+            self.tag_pattern = re.compile(tag) if strip_tags else None
+            self.pattern = re.compile(symbols)
+            self.replacement = ' '
+        else:
+            self.pattern = re.compile(f'{tag}|{symbols}' if strip_tags else symbols)
+            self.replacement = ''
+
+    def _normalize(self, text):
+        if self.unicode_form:
+            text = unicodedata.normalize(self.unicode_form, text)
+        if self.tag_pattern is not None:
+            text = self.tag_pattern.sub('', text)
+        if self.pattern is not None:
+            text = self.pattern.sub(self.replacement, text)
+        return text
+
+    def _finish(self, text):
+        if self.collapse_whitespace:
+            return ' '.join(text.split())
+        return text
+
+    def __call__(self, text):
+        return self._finish(self._normalize(text))
+
+    def normalize_batch(self, texts):
+        # 문서별 호출과 같다 (정규식은 이미 컴파일돼 있어서 여러 문서를 이어 붙여도 빨라지지 않음)
+        return [self(text) for text in texts]
+
+
+default_normalizer = TextNormalizer()
+
+
+def normalize_text(text):
+    return default_normalizer(text)
+
+
+def normalize_batch(texts):
+    return default_normalizer.normalize_batch(texts)
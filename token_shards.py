@@ -0,0 +1,181 @@
+import os
+
+import numpy as np
+
+from corpus_shards import DirectoryWriter, load_manifest
+
+FORMAT = 'tokens-v1'
+
+
+def token_dtype(vocab_size):
+    # 어휘가 65536개 이하면 토큰 하나에 2바이트
+    return 'uint16' if vocab_size <= np.iinfo(np.uint16).max + 1 else 'int32'
+
+
+def cached_key(out_dir):
+    # 이미 만들어 둔 토큰 샤드의 캐시 키 (없으면 None)
+    try:
+        return load_manifest(out_dir).get('key')
+    except (OSError, ValueError):
+        return None
+
+
+def open_cached(out_dir):
+    # 이미 만들어 둔 토큰 샤드 (없거나 형식이 다르면 None)
+    try:
+        return TokenShards(out_dir)
+    except (OSError, ValueError):
+        return None
+
+
+class TokenShardWriter(DirectoryWriter):
+    # 문서별 토큰 배열을 받는 대로 tokens-NNNNN.bin(토큰을 이어 붙인 원시 배열)에 쓰고,
+    # 문서 경계는 offsets-NNNNN.npy(int64, 문서 수 + 1)에 남긴다. 샤드는 shard_tokens개 토큰마다 나눈다.
+    # 문서 id를 함께 주면 ids-NNNNN.npy에 남겨서 코퍼스 delta로 바뀐 문서만 갈아 끼울 수 있게 한다.
+    # ShardWriter처럼 임시 디렉터리에 쓰다가 close()에서 교체한다. meta는 manifest에 그대로 남긴다.
+    def __init__(self, out_dir, dtype='uint16', shard_tokens=1 << 26, key=None, meta=None):
+        super().__init__(out_dir)
+        self.dtype = np.dtype(dtype)
+        self.shard_tokens = shard_tokens
+        self.key = key
+        self.meta = meta or {}
+        self.shards = []
+        self.docs = 0
+        self.tokens = 0
+        self._offsets = None
+        self._ids = None
+
+    def _open_shard(self):
+        index = len(self.shards)
+        self.shards.append({'tokens_file': f"tokens-{index:05d}.bin", 'offsets_file': f"offsets-{index:05d}.npy",
+                            'docs': 0, 'tokens': 0})
+        self._file = open(os.path.join(self.work_dir, self.shards[-1]['tokens_file']), 'wb')
+        self._offsets = [0]
+        self._ids = []
+
+    def _close_shard(self):
+        shard = self.shards[-1]
+        self._file.close()
+        self._file = None
+        np.save(os.path.join(self.work_dir, shard['offsets_file']), np.asarray(self._offsets, dtype=np.int64))
+        if None not in self._ids:
+            shard['ids_file'] = shard['offsets_file'].replace('offsets-', 'ids-')
+            np.save(os.path.join(self.work_dir, shard['ids_file']), np.asarray(self._ids, dtype=np.int64))
+
+    def write(self, token_ids, doc_id=None):
+        if self._file is None:
+            self._open_shard()
+        shard = self.shards[-1]
+        data = np.asarray(token_ids).astype(self.dtype, copy=False)
+        self._file.write(data.tobytes())
+        shard['tokens'] += len(data)
+        shard['docs'] += 1
+        self._offsets.append(shard['tokens'])
+        self._ids.append(doc_id)
+        self.docs += 1
+        self.tokens += len(data)
+        if shard['tokens'] >= self.shard_tokens:
+            self._close_shard()
+
+    def close(self):
+        if self._file is not None:
+            self._close_shard()
+        return self.commit({'format': FORMAT, 'key': self.key, **self.meta, 'dtype': self.dtype.name,
+                            'docs': self.docs, 'tokens': self.tokens, 'shards': self.shards})
+
+
+class TokenShards:
+    # 토큰 샤드를 np.memmap으로 열어서 문서 토큰을 복사 없이 꺼낸다. 여는 데는 offsets 배열만 읽는다.
+    def __init__(self, path):
+        self.path = path
+        self.manifest = load_manifest(path)
+        if self.manifest.get('format') != FORMAT:
+            raise ValueError(f"{path} is not a token shard directory ({FORMAT})")
+        self.dtype = np.dtype(self.manifest['dtype'])
+        self.tokens = []
+        self.offsets = []
+        self.ids = []
+        for shard in self.manifest['shards']:
+            tokens_path = os.path.join(path, shard['tokens_file'])
+            # 빈 파일은 memmap으로 열 수 없음
+            self.tokens.append(np.memmap(tokens_path, dtype=self.dtype, mode='r') if shard['tokens']
+                               else np.zeros(0, dtype=self.dtype))
+            self.offsets.append(np.load(os.path.join(path, shard['offsets_file'])))
+            self.ids.append(np.load(os.path.join(path, shard['ids_file'])) if 'ids_file' in shard else None)
+        # 전역 문서 번호 -> 샤드
+        self.doc_starts = np.cumsum([0] + [shard['docs'] for shard in self.manifest['shards']])
+
+    def __len__(self):
+        return int(self.doc_starts[-1])
+
+    def locate(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        shard = int(np.searchsorted(self.doc_starts, index, side='right')) - 1
+        return shard, index - int(self.doc_starts[shard])
+
+    def doc(self, index):
+        shard, local = self.locate(index)
+        offsets = self.offsets[shard]
+        return self.tokens[shard][offsets[local]:offsets[local + 1]]
+
+    def __getitem__(self, index):
+        return self.doc(index)
+
+    def doc_ids(self):
+        # 전체 문서 id (id 없이 만든 샤드가 하나라도 있으면 None)
+        if any(ids is None for ids in self.ids):
+            return None
+        return np.concatenate(self.ids) if self.ids else np.zeros(0, np.int64)
+
+    def doc_lengths(self):
+        return np.concatenate([np.diff(offsets) for offsets in self.offsets]) if self.offsets else np.zeros(0, int)
+
+
+class TokenDocDataset:
+    # 문서 하나 = 샘플 하나 (max_length에서 자름, 끝의 EOS는 뺌). 패딩은 collator가 배치마다 한다.
+    def __init__(self, shards, max_length=512):
+        self.shards = shards
+        self.max_length = max_length
+
+    def __len__(self):
+        return len(self.shards)
+
+    def lengths(self):
+        return np.minimum(self.shards.doc_lengths() - 1, self.max_length)
+
+    def __getitem__(self, index):
+        return {"input_ids": self.shards.doc(index)[:-1][:self.max_length].tolist()}
+
+
+class TokenBlockDataset:
+    # 샤드 안의 토큰 열(문서마다 끝에 EOS)을 block_size 블록으로 나눈 패킹 데이터셋.
+    # input_ids는 memmap 구간 그대로(복사 없음), position_ids는 문서/블록 시작마다 0부터,
+    # 문서 첫 토큰의 labels는 -100 (앞 문서의 EOS에서 다음 문서를 예측하지 않음).
+    # 문서끼리 서로 보지 않게 하는 마스크는 finetuning.PackedCollator가 position_ids로 만든다.
+    def __init__(self, shards, block_size=512):
+        self.shards = shards
+        self.block_size = block_size
+        counts = [-(-len(tokens) // block_size) for tokens in shards.tokens]
+        self.block_starts = np.cumsum([0] + counts)
+
+    def __len__(self):
+        return int(self.block_starts[-1])
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        shard = int(np.searchsorted(self.block_starts, index, side='right')) - 1
+        start = (index - int(self.block_starts[shard])) * self.block_size
+        tokens = self.shards.tokens[shard]
+        end = min(start + self.block_size, len(tokens))
+        input_ids = tokens[start:end]
+
+        offsets = self.shards.offsets[shard]
+        doc_starts = offsets[np.searchsorted(offsets, start):np.searchsorted(offsets, end)] - start
+        resets = np.zeros(end - start, dtype=np.int64)
+        resets[doc_starts] = doc_starts
+        position_ids = np.arange(end - start) - np.maximum.accumulate(resets)
+        labels = input_ids.astype(np.int64)
+        labels[doc_starts] = -100
+        return {"input_ids": input_ids, "position_ids": position_ids, "labels": labels}
@@ -0,0 +1,229 @@
+import argparse
+import json
+import resource
+import time
+
+from transformers import Trainer, TrainerCallback
+
+# 단계별 시간 항목 (data는 스텝 전체 시간에서 나머지를 뺀 값: DataLoader 대기 + 콜백/로그/체크포인트 저장)
+PHASES = ('data', 'forward', 'backward', 'optimizer')
+# 기준선과 비교할 지표와 좋은 방향 (+1: 클수록 좋음, -1: 작을수록 좋음)
+COMPARED = {'tokens_per_second': 1, 'step_seconds': -1, 'peak_rss_mb': -1, 'pad_fraction': -1}
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(steps, warmup=2):
+    # 스텝 기록들의 요약. 처음 warmup 스텝(DataLoader 작업 프로세스 시작, 첫 메모리 할당)은 뺀다
+    steps = steps[warmup:] if len(steps) > warmup else steps
+    if not steps:
+        return {}
+    seconds = sum(step['step_seconds'] for step in steps)
+    tokens = sum(step['tokens'] for step in steps)
+    padded = sum(step['padded_tokens'] for step in steps)
+    world_size = steps[-1].get('world_size', 1)
+    summary = {
+        'steps': len(steps),
+        # 기록한 프로세스(rank 0)의 처리량 x 프로세스 수로 전체 처리량을 어림
+        'tokens_per_second': tokens * world_size / seconds if seconds else 0.0,
+        'step_seconds': seconds / len(steps),
+        'pad_fraction': 1 - tokens / padded if padded else 0.0,
+        'peak_rss_mb': max(step['peak_rss_mb'] for step in steps),
+    }
+    for phase in PHASES:
+        summary[f'{phase}_fraction'] = sum(step[phase] for step in steps) / seconds if seconds else 0.0
+    return summary
+
+
+def compare(summary, baseline, tolerance=0.05):
+    # 기준선보다 tolerance 넘게 나빠진 지표 목록 [(이름, 현재, 기준, 변화율)]
+    regressions = []
+    for name, direction in COMPARED.items():
+        if name not in summary or not baseline.get(name):
+            continue
+        change = (summary[name] - baseline[name]) / baseline[name]
+        if change * direction < -tolerance:
+            regressions.append((name, summary[name], baseline[name], change))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(summary, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+def load_steps(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def format_summary(summary):
+    breakdown = ' '.join(f"{phase} {summary[f'{phase}_fraction']:.0%}" for phase in PHASES)
+    return (f"{summary['tokens_per_second']:.0f} tokens/s, {summary['step_seconds']:.2f}s/step ({breakdown}), "
+            f"pad {summary['pad_fraction']:.1%}, peak RSS {summary['peak_rss_mb']:.0f} MB")
+
+
+def print_regressions(regressions):
+    for name, value, base, change in regressions:
+        print(f"  REGRESSION {name}: {value:.4g} vs baseline {base:.4g} ({change:+.1%})")
+
+
+class TrainingTelemetry(TrainerCallback):
+    # 옵티마이저 스텝마다 처리 토큰 수(패딩 제외), 단계별 시간(data/forward/backward/optimizer), 패딩 비율,
+    # 최대 RSS를 JSONL로 남기고 print_every 스텝마다 최근 window 스텝 요약을 출력한다.
+    # baseline_path에 저장된 요약이 있으면 요약할 때마다 비교해서 나빠진 지표를 표시한다.
+    # forward/backward 시간은 TelemetryTrainer가 채운다 (Trainer만 쓰면 data에 포함됨).
+    def __init__(self, path='training_telemetry.jsonl', baseline_path=None, print_every=50, window=50,
+                 tolerance=0.05):
+        self.path = path
+        self.baseline = load_baseline(baseline_path) if baseline_path else None
+        self.print_every = print_every
+        self.window = window
+        self.tolerance = tolerance
+        self.steps = []
+        self._file = None
+        self._mark = None
+        self._optimizer_start = None
+        self._reset()
+
+    def _reset(self):
+        self.current = {'forward': 0.0, 'backward': 0.0, 'optimizer': 0.0, 'tokens': 0, 'padded_tokens': 0}
+
+    def add(self, phase, seconds):
+        self.current[phase] += seconds
+
+    def count_batch(self, inputs):
+        input_ids = inputs['input_ids']
+        mask = inputs.get('attention_mask')
+        self.current['padded_tokens'] += input_ids.numel()
+        if mask is not None and mask.dim() == 4:
+            # 문서별 4D 마스크(finetuning.document_attention_mask)는 실제 토큰 자리만 자기 자신을 본다
+            self.current['tokens'] += int((mask.diagonal(dim1=-2, dim2=-1) == 0).sum())
+        else:
+            self.current['tokens'] += int(mask.sum()) if mask is not None else input_ids.numel()
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        if self.path and state.is_world_process_zero:
+            self._file = open(self.path, 'w', encoding='utf-8')
+        self._mark = time.perf_counter()
+
+    def on_pre_optimizer_step(self, args, state, control, **kwargs):
+        self._optimizer_start = time.perf_counter()
+
+    def on_optimizer_step(self, args, state, control, **kwargs):
+        if self._optimizer_start is not None:
+            self.add('optimizer', time.perf_counter() - self._optimizer_start)
+            self._optimizer_start = None
+
+    def on_step_end(self, args, state, control, **kwargs):
+        now = time.perf_counter()
+        step_seconds = now - self._mark
+        self._mark = now
+        current = self.current
+        step = {
+            'step': state.global_step,
+            'step_seconds': round(step_seconds, 6),
+            'data': round(max(0.0, step_seconds - current['forward'] - current['backward'] - current['optimizer']), 6),
+            'forward': round(current['forward'], 6),
+            'backward': round(current['backward'], 6),
+            'optimizer': round(current['optimizer'], 6),
+            'tokens': current['tokens'],
+            'padded_tokens': current['padded_tokens'],
+            'tokens_per_second': current['tokens'] / step_seconds if step_seconds else 0.0,
+            'pad_fraction': 1 - current['tokens'] / current['padded_tokens'] if current['padded_tokens'] else 0.0,
+            'peak_rss_mb': peak_rss_mb(),
+            'world_size': args.world_size,
+        }
+        self._reset()
+        if not state.is_world_process_zero:
+            return
+        self.steps.append(step)
+        if self._file is not None:
+            self._file.write(json.dumps(step) + '\n')
+        if self.print_every and len(self.steps) % self.print_every == 0:
+            self.report(self.steps[-self.window:], f"step {state.global_step}", warmup=0)
+
+    def on_train_end(self, args, state, control, **kwargs):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if state.is_world_process_zero and self.steps:
+            self.report(self.steps, "train")
+
+    def summary(self):
+        return summarize(self.steps)
+
+    def report(self, steps, label, warmup=2):
+        summary = summarize(steps, warmup)
+        if not summary:
+            return []
+        print(f"[telemetry {label}] {format_summary(summary)}")
+        regressions = compare(summary, self.baseline, self.tolerance) if self.baseline else []
+        print_regressions(regressions)
+        return regressions
+
+
+class TelemetryTrainer(Trainer):
+    # Trainer의 한 배치 처리(training_step)와 그 안의 순전파(compute_loss)를 재서 TrainingTelemetry에 넘긴다
+    def __init__(self, *args, telemetry=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetry = telemetry
+        if telemetry is not None:
+            self.add_callback(telemetry)
+
+    def compute_loss(self, model, inputs, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().compute_loss(model, inputs, *args, **kwargs)
+        finally:
+            if self.telemetry is not None:
+                self.telemetry.add('forward', time.perf_counter() - start)
+
+    def training_step(self, model, inputs, *args, **kwargs):
+        if self.telemetry is None:
+            return super().training_step(model, inputs, *args, **kwargs)
+        self.telemetry.count_batch(inputs)
+        forward = self.telemetry.current['forward']
+        start = time.perf_counter()
+        loss = super().training_step(model, inputs, *args, **kwargs)
+        # training_step = 순전파(compute_loss) + 역전파
+        elapsed = time.perf_counter() - start
+        self.telemetry.add('backward', elapsed - (self.telemetry.current['forward'] - forward))
+        return loss
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a training telemetry log and compare it with a baseline")
+    parser.add_argument('path', nargs='?', default='training_telemetry.jsonl')
+    parser.add_argument('--baseline', default=None, help="baseline summary JSON to compare against")
+    parser.add_argument('--save-baseline', default=None, help="write this run's summary as the new baseline")
+    parser.add_argument('--warmup', type=int, default=2, help="leading steps to ignore")
+    parser.add_argument('--tolerance', type=float, default=0.05)
+    args = parser.parse_args()
+
+    summary = summarize(load_steps(args.path), args.warmup)
+    if not summary:
+        raise SystemExit(f"No steps recorded in {args.path}")
+    print(f"{summary['steps']} steps: {format_summary(summary)}")
+    regressions = []
+    if args.baseline:
+        regressions = compare(summary, load_baseline(args.baseline), args.tolerance)
+        print_regressions(regressions)
+        if not regressions:
+            print(f"No regressions against {args.baseline}")
+    if args.save_baseline:
+        save_baseline(summary, args.save_baseline)
+        print(f"Saved baseline to {args.save_baseline}")
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()